@@ -0,0 +1,281 @@
+"""
+Parallel tool-execution agent built on LocalRAGSystem.
+
+The planner LLM turns a question into a small DAG of tool calls, e.g.
+
+    {"steps": [
+        {"id": "s1", "tool": "vector_search", "args": {"query": "education budget"}},
+        {"id": "s2", "tool": "web_search", "args": {"query": "Mexico 2020 education budget cut"}},
+        {"id": "s3", "tool": "csv_aggregate", "args": {"column": "MONTO_APROBADO", "group_by": "DESC_RAMO"}}
+    ]}
+
+Steps whose ``depends_on`` are satisfied run concurrently on a thread pool,
+each with a timeout, and the whole plan is capped at ``max_steps``. Arguments
+may reference earlier results with ``{s1}``. Tool results are memoized per
+session, so a repeated call with the same arguments is free, and identical
+calls running at the same time share one execution. A multi-source
+question therefore takes about as long as its slowest tool, not the sum.
+"""
+import json
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+PLANNER_PROMPT = """You plan tool calls to answer a question about budgets.
+Available tools:
+{tools}
+
+Reply with ONLY a JSON object: {{"steps": [{{"id": "s1", "tool": "<tool>", "args": {{...}}, "depends_on": []}}]}}
+Use at most {max_steps} steps. Independent steps must not depend on each other.
+
+Question: {question}
+JSON:"""
+
+ANSWER_PROMPT = """Using ONLY these tool results:
+{context}
+
+Question: {question}
+Answer:"""
+
+
+class AgentExecutor:
+    def __init__(self, llm: Callable[[str], str], tools: Dict[str, Callable[..., object]],
+                 tool_descriptions: Optional[Dict[str, str]] = None, max_steps: int = 6,
+                 tool_timeout: float = 20.0, max_workers: int = 4):
+        self.llm = llm
+        self.tools = tools
+        self.tool_descriptions = tool_descriptions or {name: "" for name in tools}
+        self.max_steps = max_steps
+        self.tool_timeout = tool_timeout
+        self.max_workers = max_workers
+        self.memo: Dict[str, object] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget memoized tool results (start a new session)."""
+        with self._lock:
+            self.memo = {}
+
+    # ── planning ────────────────────────────────────────────────────────────
+    def default_plan(self, question: str) -> List[dict]:
+        return [
+            {"id": f"s{i + 1}", "tool": tool, "args": {"query": question}, "depends_on": []}
+            for i, tool in enumerate(t for t in ("vector_search", "keyword_search") if t in self.tools)
+        ]
+
+    def plan(self, question: str) -> List[dict]:
+        tools = "\n".join(f"- {name}: {desc}" for name, desc in self.tool_descriptions.items())
+        raw = self.llm(PLANNER_PROMPT.format(tools=tools, max_steps=self.max_steps, question=question))
+        raw = re.sub(r"<think>.*?</think>", "", raw, flags=re.DOTALL)
+        match = re.search(r"\{.*\}", raw, re.DOTALL)
+        try:
+            steps = json.loads(match.group(0))["steps"] if match else []
+        except (json.JSONDecodeError, KeyError, TypeError):
+            steps = []
+
+        valid, seen = [], set()
+        for i, step in enumerate(steps):
+            if not isinstance(step, dict) or step.get("tool") not in self.tools:
+                continue
+            step_id = str(step.get("id") or f"s{i + 1}")
+            valid.append({
+                "id": step_id,
+                "tool": step["tool"],
+                "args": step.get("args") or {},
+                "depends_on": [d for d in step.get("depends_on") or [] if d in seen],
+            })
+            seen.add(step_id)
+            if len(valid) >= self.max_steps:
+                break
+        return valid or self.default_plan(question)
+
+    # ── execution ───────────────────────────────────────────────────────────
+    @staticmethod
+    def _render(value, results: Dict[str, dict]):
+        if isinstance(value, str):
+            return re.sub(r"\{(\w+)\}", lambda m: _as_text(results[m.group(1)]["output"])
+                          if m.group(1) in results else m.group(0), value)
+        return value
+
+    def _call(self, tool: str, args: dict):
+        key = f"{tool}:{json.dumps(args, sort_keys=True, ensure_ascii=False)}"
+        with self._lock:
+            if key in self.memo:
+                return self.memo[key], True
+            shared = self._inflight.get(key)
+            if shared is None:
+                self._inflight[key] = Future()
+        if shared is not None:
+            # The same call is already running in another step; wait for its result.
+            return shared.result(), True
+
+        try:
+            output = self.tools[tool](**args)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key).set_exception(e)
+            raise
+        with self._lock:
+            self.memo[key] = output
+            self._inflight.pop(key).set_result(output)
+        return output, False
+
+    def execute(self, plan: List[dict]) -> Dict[str, dict]:
+        """Run the plan DAG. Returns ``{step_id: {tool, output, error, seconds, cached}}``."""
+        results: Dict[str, dict] = {}
+        pending = list(plan)
+        running = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-tool")
+        try:
+            while pending or running:
+                for step in list(pending):
+                    deps = step["depends_on"]
+                    if any(d not in results for d in deps):
+                        continue
+                    pending.remove(step)
+                    if any(results[d]["error"] for d in deps):
+                        results[step["id"]] = {"tool": step["tool"], "output": None, "seconds": 0.0,
+                                               "cached": False, "error": "skipped: dependency failed"}
+                        continue
+                    args = {k: self._render(v, results) for k, v in step["args"].items()}
+                    future = executor.submit(self._call, step["tool"], args)
+                    running[future] = (step, time.time())
+
+                if not running:
+                    if pending:
+                        # Unsatisfiable dependencies (cycles); drop the rest.
+                        for step in pending:
+                            results[step["id"]] = {"tool": step["tool"], "output": None, "seconds": 0.0,
+                                                   "cached": False, "error": "skipped: unresolved dependency"}
+                        pending = []
+                    break
+
+                now = time.time()
+                next_deadline = min(started + self.tool_timeout for _, started in running.values())
+                done, _ = wait(list(running), timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+                now = time.time()
+                for future in list(running):
+                    step, started = running[future]
+                    if future in done:
+                        entry = {"tool": step["tool"], "seconds": round(now - started, 3), "error": None,
+                                 "output": None, "cached": False}
+                        try:
+                            entry["output"], entry["cached"] = future.result()
+                        except Exception as e:
+                            entry["error"] = str(e)
+                        results[step["id"]] = entry
+                        del running[future]
+                    elif now - started >= self.tool_timeout:
+                        future.cancel()
+                        results[step["id"]] = {"tool": step["tool"], "output": None, "cached": False,
+                                               "seconds": round(now - started, 3),
+                                               "error": f"timeout after {self.tool_timeout}s"}
+                        del running[future]
+        finally:
+            # Timed-out tools keep running in their threads; don't wait for them.
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def run(self, question: str) -> dict:
+        start = time.time()
+        plan = self.plan(question)
+        plan_s = time.time() - start
+
+        results = self.execute(plan)
+        tools_s = time.time() - start - plan_s
+
+        context = "\n\n".join(
+            f"[{step_id}] {r['tool']}:\n{_as_text(r['output'])}"
+            for step_id, r in results.items() if not r["error"]
+        ) or "No tool returned results."
+        answer = self.llm(ANSWER_PROMPT.format(context=context, question=question))
+
+        return {
+            "question": question,
+            "answer": answer,
+            "plan": plan,
+            "results": results,
+            "timings": {
+                "plan_s": round(plan_s, 3),
+                "tools_s": round(tools_s, 3),
+                "answer_s": round(time.time() - start - plan_s - tools_s, 3),
+            },
+        }
+
+
+def _as_text(output) -> str:
+    if output is None:
+        return ""
+    if isinstance(output, str):
+        return output
+    if isinstance(output, list):
+        return "\n".join(_as_text(item.get("text", item) if isinstance(item, dict) else item) for item in output)
+    return json.dumps(output, ensure_ascii=False, default=str)
+
+
+class ScriptedLLM:
+    """Test double that replies with a fixed sequence of responses."""
+
+    def __init__(self, responses: List[str]):
+        self.responses = list(responses)
+        self.prompts: List[str] = []
+
+    def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self.responses.pop(0) if self.responses else ""
+
+
+def csv_aggregate_tool(csv_path: str) -> Callable[..., object]:
+    """Sum a numeric column of the budget CSV, optionally filtered and grouped."""
+    import pandas as pd
+
+    df = None
+
+    def csv_aggregate(column: str = "MONTO_APROBADO", group_by: Optional[str] = None,
+                      contains: Optional[str] = None, top: int = 10):
+        nonlocal df
+        if df is None:
+            df = pd.read_csv(csv_path, low_memory=False)
+        data = df
+        if contains:
+            text = data.select_dtypes(include="object").apply(lambda c: c.str.contains(contains, case=False, na=False))
+            data = data[text.any(axis=1)]
+        values = pd.to_numeric(data[column], errors="coerce")
+        if group_by:
+            return values.groupby(data[group_by]).sum().sort_values(ascending=False).head(top).to_dict()
+        return {"column": column, "rows": int(values.notna().sum()), "sum": float(values.sum())}
+
+    return csv_aggregate
+
+
+def build_tools(rag, web_search: Optional[Callable[[str], List[str]]] = None,
+                csv_path: Optional[str] = "./data/presupuesto_mexico__2020.csv"):
+    """Tool table for a LocalRAGSystem: LanceDB vector/keyword search, web search, CSV aggregates."""
+    # Plain searches: lancedb_setup.retrieve_similar_docs adds a LinearCombinationReranker,
+    # which only supports hybrid queries.
+    def search(query: str, query_type: str, limit: int) -> List[str]:
+        return [d["text"] for d in rag.db.search(query, query_type=query_type).limit(limit).to_list()]
+
+    tools = {
+        "vector_search": lambda query, limit=5: search(query, "vector", limit),
+        "keyword_search": lambda query, limit=5: search(query, "fts", limit),
+    }
+    descriptions = {
+        "vector_search": 'semantic search over the knowledge base. args: {"query": str}',
+        "keyword_search": 'full-text keyword search over the knowledge base. args: {"query": str}',
+    }
+    if web_search:
+        tools["web_search"] = lambda query: web_search(query)
+        descriptions["web_search"] = 'live web search snippets. args: {"query": str}'
+    if csv_path:
+        tools["csv_aggregate"] = csv_aggregate_tool(csv_path)
+        descriptions["csv_aggregate"] = (
+            'sum a budget column. args: {"column": "MONTO_APROBADO", "group_by": optional column, '
+            '"contains": optional text filter}'
+        )
+    return tools, descriptions
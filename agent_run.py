@@ -1,4 +1,5 @@
 import os
+import sys
 # Block any OpenAI initialization attempts
 os.environ["OPENAI_API_KEY"] = "local"
 os.environ["OPENAI_API_BASE"] = "http://localhost:11434"  # Point to Ollama if anything tries to use it
@@ -60,9 +61,26 @@ class LocalRAGSystem:
             "docs": docs
         }
 
+    def agent(self, web_search=None, use_web=True, **kwargs):
+        """Agent executor that plans and runs tool calls in parallel over this system."""
+        from agent_executor import AgentExecutor, build_tools
+
+        if web_search is None and use_web:
+            from chroma_database.web_search import CachedSearchProvider, DuckDuckGoProvider
+
+            # Cached and rate limited, shared with ChromaManager's web search cache
+            web_search = CachedSearchProvider(
+                DuckDuckGoProvider(), cache_path="./chroma_database/web_cache.sqlite3"
+            ).search
+        tools, descriptions = build_tools(self, web_search=web_search)
+        return AgentExecutor(lambda prompt: self.llm.invoke(prompt), tools, descriptions, **kwargs)
+
 def main():
     try:
         rag = LocalRAGSystem()
+        # `python agent_run.py --agent` plans parallel tool calls instead of the fixed pipeline
+        # (add --no-web to leave out the web search tool)
+        agent = rag.agent(use_web="--no-web" not in sys.argv) if "--agent" in sys.argv else None
         print("System ready. Type 'quit' to exit.")
         
         while True:
@@ -70,7 +88,14 @@ def main():
             if question.lower() in ('quit', 'exit'):
                 break
                 
-            result = rag.generate_response(question)
+            if agent:
+                result = agent.run(question)
+                result["docs"] = [
+                    {"text": f"{r['tool']}: {str(r['output'])}"} for r in result["results"].values() if not r["error"]
+                ]
+                print(f"\nTool timings: {result['timings']}")
+            else:
+                result = rag.generate_response(question)
             print(f"\nAnswer: {result['answer']}")
             if result['docs']:
                 print("\nSources used:")
@@ -1,9 +1,20 @@
 import gradio as gr
 from chroma_database.manager import ChromaManager
+from chroma_database.router import ModelRouter
+from chroma_database.ingest import IngestJobManager
+from chroma_database.maintenance import MaintenanceScheduler
+import os
 import time
 
 def create_interface():
-    db = ChromaManager()
+    # Set RAG_MODELS=myqwen3,llama3.2 to route between small and large models
+    db = ChromaManager(router=ModelRouter.from_env())
+    jobs = IngestJobManager(db)
+    jobs.resume_incomplete()
+    # Set RAG_MAINTENANCE_HOURS=24 to compact/vacuum storage periodically
+    maintenance = MaintenanceScheduler.from_env(chroma_dir=db.persist_dir, collection=db.collection)
+    if maintenance:
+        maintenance.start()
     
     with gr.Blocks(title="RA Local system", theme=gr.themes.Soft()) as app:
         gr.Markdown("# 📚 RA for budget analysis\n Welcome to this project in which a RA will help you analyze your pdfs.\nThis system uses a fully local QWEN3 model quantized in 4 bits.") 
@@ -18,9 +29,27 @@ def create_interface():
                 
                 with gr.Column():
                     pdf_upload = gr.File(label="PDF File", file_types=[".pdf"], file_count="single")
+                    pdf_summarize = gr.Checkbox(label="Build summaries for broad questions (runs in background)", value=False)
                     pdf_status = gr.Textbox(label="Status", interactive=False)
                     pdf_btn = gr.Button("📎 Upload PDF", variant="primary")
         
+        # Background ingest jobs
+        with gr.Tab("⏳ Ingest Jobs"):
+            gr.Markdown("### Large CSV/PDF files are ingested in the background and resume from their last checkpoint.")
+            with gr.Row():
+                job_file = gr.File(label="CSV or PDF File", file_types=[".csv", ".pdf"], file_count="single")
+                with gr.Column():
+                    job_btn = gr.Button("🚀 Start Ingest Job", variant="primary")
+                    job_id_box = gr.Textbox(label="Job ID")
+                    resume_btn = gr.Button("🔁 Resume Job")
+                    refresh_btn = gr.Button("🔄 Refresh Status")
+            job_table = gr.DataFrame(
+                headers=["Job", "File", "Status", "Progress", "Uploaded", "Error"],
+                datatype=["str", "str", "str", "str", "number", "str"],
+                interactive=False,
+                wrap=True,
+            )
+
         # QA Section
         with gr.Tab("### ❓ Ask Questions..."):
             gr.Markdown("### Type a question about your uploaded documents and get smarter answers")
@@ -31,6 +60,7 @@ def create_interface():
                         label="Your Question",
                         placeholder="e.g., what was the biggest budget cut in 2022?"
                     )
+                    use_summaries = gr.Checkbox(label="Broad question: search document summaries first", value=False)
                     ask_btn = gr.Button("🔍 Get Answer", variant="primary")
             with gr.Column(scale=2):
                 answer = gr.Textbox(label="RA's Answer", lines=5, interactive=False, show_copy_button=True)
@@ -45,6 +75,20 @@ def create_interface():
                 wrap=True,
                 row_count=(2, "dynamic"),
             )
+        # Multi-turn chat: follow-up questions reuse the model's prompt cache
+        with gr.Tab("💬 Chat"):
+            gr.Markdown("### Ask follow-up questions; documents already sent are not repeated.")
+            chat_session = gr.State(None)
+            chatbot = gr.Chatbot(label="Conversation", height=400)
+            with gr.Row():
+                chat_input = gr.Textbox(
+                    label="Your Message",
+                    placeholder="e.g., and how much of it was actually paid?",
+                    scale=4,
+                )
+                chat_btn = gr.Button("💬 Send", variant="primary", scale=1)
+            chat_reset_btn = gr.Button("🧹 New Conversation")
+
         with gr.Tab("🌐 Web + Local Assistant"):
             gr.Markdown("### 🌍 Ask with Web Search\nWe’ll combine your documents with live web results.")
 
@@ -83,12 +127,12 @@ def create_interface():
                # f"Time: {elapsed:.1f}s"
             #)
         
-        def handle_pdf(file):
+        def handle_pdf(file, summarize):
             if not file:
                 return "No file selected"
             
             start = time.time()
-            total, uploaded = db.upload_pdf(file.name)
+            total, uploaded = db.upload_pdf(file.name, summarize=summarize)
             elapsed = time.time() - start
             
             return (
@@ -97,18 +141,59 @@ def create_interface():
                 f"Time: {elapsed:.1f}s"
             )
         
-        def handle_question(query):
-            answer_text, sources_data = db.query(query)
+        def job_rows():
+            return [
+                [j["id"], os.path.basename(j["path"]), j["status"], f"{j['progress']:.1%}", j["uploaded"], j["error"] or ""]
+                for j in jobs.list_jobs()
+            ]
+
+        def handle_job(file):
+            if not file:
+                return "", job_rows()
+            if file.name.lower().endswith(".pdf"):
+                job_id = jobs.submit_pdf(file.name)
+            else:
+                job_id = jobs.submit_csv(file.name)
+            return job_id, job_rows()
+
+        def handle_resume(job_id):
+            if job_id.strip():
+                jobs.resume(job_id.strip())
+            return job_rows()
+
+        def handle_question(query, broad):
+            if broad:
+                answer_text, sources_data = db.query_hierarchical(query)
+            else:
+                answer_text, sources_data = db.query(query)
             return answer_text, [[s] for s in sources_data]
         
+        def handle_chat(message, history, session):
+            if not message.strip():
+                return "", history, session
+            session = session or db.start_chat()
+            answer_text, _ = session.ask(message)
+            return "", history + [[message, answer_text]], session
+
+        def handle_chat_reset(session):
+            if session:
+                session.reset()
+            return [], session
+
         def handle_web_query(query):
             answer_text, sources_data = db.query_with_web(query)
             return answer_text, sources_data
  
         
         #csv_btn.click(handle_csv, inputs=csv_upload, outputs=csv_status)
-        pdf_btn.click(handle_pdf, inputs=pdf_upload, outputs=pdf_status)
-        ask_btn.click(handle_question, inputs=question, outputs=[answer, sources])
+        pdf_btn.click(handle_pdf, inputs=[pdf_upload, pdf_summarize], outputs=pdf_status)
+        job_btn.click(handle_job, inputs=job_file, outputs=[job_id_box, job_table])
+        resume_btn.click(handle_resume, inputs=job_id_box, outputs=job_table)
+        refresh_btn.click(job_rows, outputs=job_table)
+        ask_btn.click(handle_question, inputs=[question, use_summaries], outputs=[answer, sources])
+        chat_btn.click(handle_chat, inputs=[chat_input, chatbot, chat_session], outputs=[chat_input, chatbot, chat_session])
+        chat_input.submit(handle_chat, inputs=[chat_input, chatbot, chat_session], outputs=[chat_input, chatbot, chat_session])
+        chat_reset_btn.click(handle_chat_reset, inputs=chat_session, outputs=[chatbot, chat_session])
         web_btn.click(handle_web_query, inputs=web_query, outputs=[web_answer, web_sources])
     
     return app
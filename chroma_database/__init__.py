@@ -2,17 +2,54 @@
 ChromaDB Document Management Package
 
 This package provides tools for managing document collections in ChromaDB:
-- CSV and PDF document uploading
-- Semantic querying with Ollama integration
-- Persistent storage management
+- CSV and PDF document uploading, with near-duplicate row collapsing and resumable background ingest jobs
+- Optional in-process ONNX embeddings
+- Semantic querying with Ollama integration and adaptive top-k retrieval, including a hierarchical summary tier for long PDFs
+- Persistent storage management (Chroma or an in-process NumPy flat index)
+- Multi-turn chat sessions with stable-prefix prompt reuse
+- Batch question answering with bounded LLM concurrency
+- Model cascade routing across local Ollama models
+- Storage maintenance (LanceDB compaction, Chroma vacuum)
+- Cached, rate-limited web search providers
+- Portable Arrow/Parquet snapshots (export/import without re-embedding)
 
 Example usage:
     >>> from chroma_db.manager import ChromaManager
     >>> db = ChromaManager()
     >>> db.upload_csv("data.csv")
 """
-from .manager import ChromaManager
+import importlib
+
+# Submodules are imported on first attribute access, so ``chroma_database.dedup``
+# and friends can be used without pulling in chromadb, ollama and pypdf.
+_EXPORTS = {
+    'ChromaManager': 'manager',
+    'adaptive_retrieve': 'adaptive', 'select_documents': 'adaptive',
+    'answer_questions': 'batch', 'load_questions': 'batch',
+    'ChatSession': 'chat',
+    'collapse_rows': 'dedup',
+    'FlatIndexCollection': 'flat_index',
+    'IngestJobManager': 'ingest',
+    'MaintenanceScheduler': 'maintenance', 'run_maintenance': 'maintenance',
+    'OnnxEmbedder': 'onnx_embedder',
+    'ModelRouter': 'router',
+    'CachedSearchProvider': 'web_search', 'DuckDuckGoProvider': 'web_search',
+    'SearchProvider': 'web_search', 'StubSearchProvider': 'web_search',
+    'SummaryIndex': 'summaries',
+    'export_collection': 'snapshot', 'export_lancedb': 'snapshot',
+    'import_to_collection': 'snapshot', 'import_to_lancedb': 'snapshot',
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 # Package version
 __version__ = "1.0.0"
-__all__ = ['ChromaManager']
\ No newline at end of file
+__all__ = ['ChromaManager', 'adaptive_retrieve', 'select_documents', 'answer_questions', 'load_questions', 'ChatSession', 'ModelRouter', 'FlatIndexCollection', 'collapse_rows', 'IngestJobManager', 'MaintenanceScheduler', 'SummaryIndex', 'OnnxEmbedder', 'run_maintenance', 'export_collection', 'export_lancedb', 'import_to_collection', 'import_to_lancedb',
+           'SearchProvider', 'DuckDuckGoProvider', 'StubSearchProvider', 'CachedSearchProvider']
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Adaptive top-k retrieval with early exit.
+
+Instead of pasting a fixed ``n_results`` documents into the prompt:
+- documents farther than ``max_distance`` are dropped
+- the list is cut at the first jump of more than ``max_gap`` between
+  consecutive distances (the relevant head ends there)
+- only when nothing was cut and even the k-th result is within the tighter
+  ``dense_distance`` are the results dense enough to look further: ``k`` is
+  doubled once (``max_k`` defaults to ``2 * k``) and the search rerun
+
+If nothing clears the threshold the caller can skip the LLM call entirely and
+answer with ``NO_CONTEXT_ANSWER``.
+
+Distances are Chroma's (squared L2 by default; lower is closer). For unit
+vectors that is ``2 - 2 * cosine``, so the defaults ``max_distance=1.0`` and
+``dense_distance=0.6`` mean cosine similarities of 0.5 and 0.7.
+"""
+from typing import List, Optional, Tuple
+
+NO_CONTEXT_ANSWER = "No relevant context was found in the knowledge base for this question."
+
+
+MAX_DISTANCE = 1.0
+DENSE_DISTANCE = 0.6
+MAX_GAP = 0.15
+
+
+def select_documents(documents: List[str], distances: List[float], max_distance: Optional[float] = MAX_DISTANCE,
+                     max_gap: Optional[float] = MAX_GAP) -> Tuple[List[str], List[float], bool]:
+    """
+    Filter one result list. Returns ``(documents, distances, cut)`` where
+    ``cut`` tells whether the threshold or gap removed anything.
+    """
+    kept_docs, kept_dists = [], []
+    for doc, dist in zip(documents, distances):
+        if max_distance is not None and dist > max_distance:
+            break
+        if max_gap is not None and kept_dists and dist - kept_dists[-1] > max_gap:
+            break
+        kept_docs.append(doc)
+        kept_dists.append(dist)
+    return kept_docs, kept_dists, len(kept_docs) < len(documents)
+
+
+def adaptive_retrieve(collection, question: str, k: int = 5, max_k: Optional[int] = None,
+                      max_distance: Optional[float] = MAX_DISTANCE, max_gap: Optional[float] = MAX_GAP,
+                      dense_distance: Optional[float] = DENSE_DISTANCE, with_ids: bool = False) -> tuple:
+    """
+    Query ``collection`` and grow ``k`` while even the k-th result is a close match.
+
+    Returns ``(documents, distances)``, or ``(ids, documents, distances)`` with ``with_ids``.
+    """
+    max_k = 2 * k if max_k is None else max_k
+    while True:
+        results = collection.query(query_texts=[question], n_results=k)
+        documents, distances = results["documents"][0], results["distances"][0]
+        if with_ids:
+            documents = list(zip(results["ids"][0], documents))
+        kept_docs, kept_dists, cut = select_documents(documents, distances, max_distance, max_gap)
+        exhausted = len(documents) < k
+        dense = dense_distance is not None and bool(kept_dists) and kept_dists[-1] <= dense_distance
+        if cut or exhausted or not dense or k >= max_k:
+            break
+        k = min(k * 2, max_k)
+    if with_ids:
+        return [i for i, _ in kept_docs], [d for _, d in kept_docs], kept_dists
+    return kept_docs, kept_dists
@@ -0,0 +1,143 @@
+"""
+Batch question answering for reports and offline evaluation.
+
+Questions are retrieved in chunks with a single multi-query
+``collection.query(query_texts=[...])`` call (one batched embedding request),
+and LLM generations run on a bounded thread pool. Throughput therefore scales
+with the number of requests the Ollama server handles in parallel
+(``OLLAMA_NUM_PARALLEL``); set ``max_workers`` to match it.
+
+Usage:
+    python -m chroma_database.batch questions.txt --out answers.jsonl --workers 4
+"""
+import argparse
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional
+
+from .adaptive import NO_CONTEXT_ANSWER, select_documents
+
+
+def load_questions(path: str) -> List[str]:
+    """Read one question per line (.txt) or a ``question`` field per line (.jsonl)."""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                line = json.loads(line)["question"]
+            questions.append(line)
+    return questions
+
+
+def answer_questions(manager, questions: List[str], n_results: int = 5, max_workers: int = 4,
+                     retrieval_batch: int = 64, output_path: Optional[str] = None,
+                     append: bool = False) -> Iterator[dict]:
+    """
+    Yield one result dict per question as soon as its answer is ready.
+
+    Results arrive in completion order; sort by ``index`` to restore the input
+    order. Each result holds ``index``, ``question``, ``answer``, ``sources``
+    and ``timings`` (retrieval share, generation and total seconds). When
+    ``output_path`` is given, results are also written to it as JSONL
+    (overwriting it unless ``append``).
+    """
+    out = open(output_path, "a" if append else "w", encoding="utf-8") if output_path else None
+    start_total = time.time()
+
+    def _generate(index: int, question: str, documents: List[str], distances: List[float],
+                  retrieval_s: float) -> dict:
+        start = time.time()
+        documents, distances, _ = select_documents(documents, distances,
+                                                   getattr(manager, "relevance_threshold", None),
+                                                   getattr(manager, "score_gap", None))
+        try:
+            answer = manager.generate(question, documents, distances) if documents else NO_CONTEXT_ANSWER
+        except Exception as e:
+            answer = f"Error: {str(e)}"
+        generation_s = time.time() - start
+        return {
+            "index": index,
+            "question": question,
+            "answer": answer,
+            "sources": documents,
+            "timings": {
+                "retrieval_s": round(retrieval_s, 4),
+                "generation_s": round(generation_s, 4),
+                "total_s": round(retrieval_s + generation_s, 4),
+            },
+        }
+
+    def _emit(future) -> dict:
+        result = future.result()
+        if out:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for offset in range(0, len(questions), retrieval_batch):
+                chunk = questions[offset:offset + retrieval_batch]
+                start = time.time()
+                results = manager.collection.query(query_texts=chunk, n_results=n_results)
+                per_question = (time.time() - start) / len(chunk)
+
+                for i, (question, documents, distances) in enumerate(
+                        zip(chunk, results["documents"], results["distances"])):
+                    pending.add(executor.submit(_generate, offset + i, question, documents,
+                                                distances, per_question))
+
+                # Hand out answers finished so far before retrieving the next chunk
+                done = {f for f in pending if f.done()}
+                pending -= done
+                for future in done:
+                    yield _emit(future)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _emit(future)
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.time() - start_total
+    if questions:
+        print(f"Answered {len(questions)} questions in {elapsed:.2f}s "
+              f"({len(questions) / elapsed:.2f} q/s, {max_workers} workers)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a file of questions against the knowledge base")
+    parser.add_argument("questions", help=".txt (one per line) or .jsonl with a 'question' field")
+    parser.add_argument("--out", default="answers.jsonl")
+    parser.add_argument("--append", action="store_true", help="Append to --out instead of overwriting it")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--persist-dir", default="./chroma_database")
+    parser.add_argument("--collection", default="RAGTutorial")
+    parser.add_argument("--model", default="myqwen3")
+    parser.add_argument("--models", default=None, help="Comma-separated cascade, e.g. myqwen3,llama3.2")
+    args = parser.parse_args()
+
+    from .manager import ChromaManager
+    from .router import ModelRouter
+
+    router = ModelRouter(models=args.models.split(",")) if args.models else ModelRouter.from_env()
+    db = ChromaManager(persist_dir=args.persist_dir, collection_name=args.collection,
+                       chat_model=args.model, router=router)
+    questions = load_questions(args.questions)
+    for result in answer_questions(db, questions, n_results=args.n_results,
+                                   max_workers=args.workers, output_path=args.out, append=args.append):
+        print(f"[{result['index'] + 1}/{len(questions)}] {result['timings']['total_s']:.2f}s {result['question'][:80]}")
+    if router:
+        print(json.dumps(router.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
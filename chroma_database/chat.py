@@ -0,0 +1,225 @@
+"""
+Multi-turn chat sessions that keep the prompt prefix stable across turns.
+
+A stateless ``ollama.chat`` call rebuilds the system prompt and all context
+documents for every question, so the model server has to prefill them again.
+``ChatSession`` instead lays the prompt out as
+
+    [system prompt + pinned context]  (never changes)
+    [previous turns]                  (append-only)
+    [new documents + question]        (the delta)
+
+so every request extends the previous one and Ollama can reuse its prompt/KV
+cache. Documents that were already sent in an earlier turn are not repeated.
+When the history outgrows ``max_context_tokens`` the oldest turns are folded
+into a summary message, and their documents become eligible to be sent again.
+
+Retrieval goes through ``adaptive_retrieve`` with the manager's thresholds, so
+a question with no relevant documents gets ``NO_CONTEXT_ANSWER`` without an
+LLM call, and generation goes through ``manager.router`` when one is set.
+
+Run ``python -m chroma_database.chat`` for a benchmark against a stub server
+that reports prefix-hit tokens.
+"""
+import time
+from typing import Callable, List, Optional
+
+import ollama
+
+from .adaptive import DENSE_DISTANCE, MAX_DISTANCE, MAX_GAP, NO_CONTEXT_ANSWER, adaptive_retrieve
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You are an expert in analyzing budgets in countries. "
+    "Answer using ONLY the provided context. Reply in english and in a very synthetic way."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return max(1, len(text) // 4)
+
+
+class ChatSession:
+    def __init__(self, manager, system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+                 pinned_context: Optional[List[str]] = None, n_results: int = 5,
+                 max_context_tokens: int = 6000, keep_recent_turns: int = 2,
+                 chat_fn: Callable = ollama.chat, keep_alive: str = "30m"):
+        self.manager = manager
+        self.n_results = n_results
+        self.max_context_tokens = max_context_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.chat_fn = chat_fn
+        self.keep_alive = keep_alive
+
+        prefix = system_prompt
+        if pinned_context:
+            prefix += "\n\nPinned context:\n" + "\n\n".join(
+                f"PINNED {i+1}:\n{text}" for i, text in enumerate(pinned_context)
+            )
+        self.prefix = {"role": "system", "content": prefix}
+        self.summary: Optional[dict] = None
+        self.turns: List[List[dict]] = []
+        self.turn_docs: List[List[str]] = []  # ids first sent in each turn, aligned with turns
+        self.seen_docs = set()
+        self.stats = {"turns": 0, "prompt_tokens": 0, "prompt_eval_tokens": 0, "summaries": 0}
+
+    def messages(self) -> List[dict]:
+        messages = [self.prefix]
+        if self.summary:
+            messages.append(self.summary)
+        for turn in self.turns:
+            messages.extend(turn)
+        return messages
+
+    def _context_tokens(self) -> int:
+        return sum(estimate_tokens(m["content"]) for m in self.messages())
+
+    def _chat(self, messages: List[dict]) -> dict:
+        return self.chat_fn(model=self.manager.chat_model, messages=messages, keep_alive=self.keep_alive)
+
+    def _summarize_old_turns(self):
+        """Fold everything but the most recent turns into one summary message."""
+        split = max(0, len(self.turns) - self.keep_recent_turns)
+        old, self.turns = self.turns[:split], self.turns[split:]
+        old_docs, self.turn_docs = self.turn_docs[:split], self.turn_docs[split:]
+        if not old:
+            return
+        # Documents of summarized turns are no longer in the prompt.
+        for ids in old_docs:
+            self.seen_docs.difference_update(ids)
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for turn in old for m in turn)
+        if self.summary:
+            transcript = f"{self.summary['content']}\n{transcript}"
+        response = self._chat([
+            {"role": "system", "content": "Summarize this conversation, keeping every figure and fact needed for follow-up questions."},
+            {"role": "user", "content": transcript},
+        ])
+        self.summary = {"role": "system", "content": f"Conversation so far:\n{response['message']['content']}"}
+        self.stats["summaries"] += 1
+
+    def _user_message(self, question: str, ids: List[str], documents: List[str]) -> tuple:
+        new = [(doc_id, doc) for doc_id, doc in zip(ids, documents) if doc_id not in self.seen_docs]
+        content = question
+        if new:
+            context = "\n\n".join(doc for _, doc in new)
+            content = f"Additional context:\n{context}\n\nQuestion: {question}"
+        return {"role": "user", "content": content}, [doc_id for doc_id, _ in new], [doc for _, doc in new]
+
+    def _retrieve(self, question: str) -> tuple:
+        manager = self.manager
+        max_results = getattr(manager, "max_results", None)
+        return adaptive_retrieve(
+            manager.collection,
+            question,
+            k=self.n_results,
+            max_k=max(self.n_results, max_results) if max_results else None,
+            max_distance=getattr(manager, "relevance_threshold", MAX_DISTANCE),
+            max_gap=getattr(manager, "score_gap", MAX_GAP),
+            dense_distance=getattr(manager, "dense_threshold", DENSE_DISTANCE),
+            with_ids=True,
+        )
+
+    def ask(self, question: str) -> tuple:
+        """Answer a question in the context of the session. Returns ``(answer, new_documents)``."""
+        try:
+            ids, documents, distances = self._retrieve(question)
+            if not documents:
+                # Nothing relevant: skip the LLM call entirely
+                return NO_CONTEXT_ANSWER, []
+            user_message, new_ids, new_docs = self._user_message(question, ids, documents)
+
+            if self._context_tokens() + estimate_tokens(user_message["content"]) > self.max_context_tokens:
+                self._summarize_old_turns()
+                user_message, new_ids, new_docs = self._user_message(question, ids, documents)
+
+            messages = self.messages() + [user_message]
+            router = getattr(self.manager, "router", None)
+            if router:
+                answer, _ = router.answer(messages, question, distances)
+                response = {}
+            else:
+                response = self._chat(messages)
+                answer = response["message"]["content"]
+        except Exception as e:
+            return f"Error: {str(e)}", []
+
+        self.seen_docs.update(new_ids)
+        self.turns.append([user_message, {"role": "assistant", "content": answer}])
+        self.turn_docs.append(new_ids)
+        self.stats["turns"] += 1
+        self.stats["prompt_tokens"] += sum(estimate_tokens(m["content"]) for m in messages)
+        self.stats["prompt_eval_tokens"] += response.get("prompt_eval_count") or 0
+        return answer, new_docs
+
+    def reset(self):
+        self.summary = None
+        self.turns = []
+        self.turn_docs = []
+        self.seen_docs = set()
+
+
+class PrefixCacheStub:
+    """
+    Stand-in for a model server with a single-slot prompt cache.
+
+    It remembers the previous prompt, counts how many leading tokens the new
+    prompt shares with it (the tokens a real server would not prefill again),
+    and reports ``prompt_eval_count`` like Ollama does.
+    """
+
+    def __init__(self, ms_per_prefill_token: float = 0.0):
+        self.ms_per_prefill_token = ms_per_prefill_token
+        self.last_prompt: List[str] = []
+        self.prompt_tokens = 0
+        self.prefix_hit_tokens = 0
+
+    def __call__(self, model: str, messages: List[dict], **kwargs) -> dict:
+        prompt = " ".join(f"<{m['role']}> {m['content']}" for m in messages).split()
+        hit = 0
+        for a, b in zip(self.last_prompt, prompt):
+            if a != b:
+                break
+            hit += 1
+        evaluated = len(prompt) - hit
+        self.last_prompt = prompt + ["<assistant>", "ok"]
+        self.prompt_tokens += len(prompt)
+        self.prefix_hit_tokens += hit
+        if self.ms_per_prefill_token:
+            time.sleep(evaluated * self.ms_per_prefill_token / 1000)
+        return {"message": {"content": "ok"}, "prompt_eval_count": evaluated}
+
+
+def benchmark(questions: List[str], manager, ms_per_prefill_token: float = 0.05):
+    """Compare stateless ``query``-style prompts with a ``ChatSession`` on a stub server."""
+    stateless = PrefixCacheStub(ms_per_prefill_token)
+    start = time.time()
+    for question in questions:
+        results = manager.collection.query(query_texts=[question], n_results=5)
+        stateless(manager.chat_model, manager._build_messages(question, results["documents"][0]))
+    stateless_s = time.time() - start
+
+    stub = PrefixCacheStub(ms_per_prefill_token)
+    session = ChatSession(manager, chat_fn=stub)
+    start = time.time()
+    for question in questions:
+        session.ask(question)
+    session_s = time.time() - start
+
+    for name, s, elapsed in (("stateless", stateless, stateless_s), ("session", stub, session_s)):
+        print(f"{name:>10}: {s.prompt_tokens} prompt tokens, {s.prefix_hit_tokens} prefix-hit "
+              f"({s.prefix_hit_tokens / max(1, s.prompt_tokens):.0%}), "
+              f"{s.prompt_tokens - s.prefix_hit_tokens} prefilled, {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    from .manager import ChromaManager
+
+    benchmark(
+        [
+            "What was the approved budget for education in 2020?",
+            "And how much of it was actually paid?",
+            "Which program inside it received the most?",
+            "Compare that with health.",
+        ],
+        ChromaManager(),
+    )
@@ -0,0 +1,225 @@
+"""
+Near-duplicate collapsing of CSV rows before embedding.
+
+The budget CSV repeats the same program and ``DESC_PARTIDA_ESPECIFICA`` text
+across thousands of rows that only differ in amounts. Embedding each row pays
+for near-identical vectors and fills the top-k with clones. ``collapse_rows``
+groups rows by their text template instead:
+
+1. numeric columns (amounts, units) are split off from the text columns
+2. rows whose normalized text is identical share a group (exact hash); code
+   and period columns (``ID_*``, ``CICLO``...) must match verbatim
+3. optionally (``max_hamming > 0``), groups that agree on every other text
+   column and whose ``near_dup_column`` (the description) has a 64-bit SimHash
+   within ``max_hamming`` bits are merged, using banded LSH so only likely
+   pairs are compared. Candidates must also share most character trigrams of
+   that description, so different partidas of one program never merge.
+
+Only one representative per group is embedded; the member rows and their
+numeric fields travel along as metadata.
+"""
+import csv
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+SIMHASH_BITS = 64
+# Identifier and period columns are numeric but are not amounts: they stay in the text.
+CODE_COLUMN = re.compile(r"^(ID|CVE|CLAVE|CLV|COD|CODIGO)(_|$)|^(CICLO|ANIO|AÑO|YEAR)$", re.IGNORECASE)
+NEAR_DUP_COLUMN = "DESC_PARTIDA_ESPECIFICA"
+
+
+def _to_number(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", "").replace("$", "").strip())
+    except ValueError:
+        return None
+
+
+def detect_numeric_columns(header: List[str], rows: List[List[str]], sample: int = 2000,
+                           min_ratio: float = 0.9) -> List[str]:
+    """Amount-like columns: (almost) all values are numbers and the name is not a code or period column."""
+    numeric = []
+    for col, name in enumerate(header):
+        if CODE_COLUMN.search(name.strip()):
+            continue
+        values = [row[col] for row in rows[:sample] if col < len(row) and row[col].strip()]
+        # Constant columns (e.g. CICLO in a single-year file) stay in the text
+        if len(set(values)) < 2:
+            continue
+        if sum(_to_number(v) is not None for v in values) / len(values) >= min_ratio:
+            numeric.append(name)
+    return numeric
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, mask digit runs and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"\d+", "#", text)
+    text = re.sub(r"[^\w#|:]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word and character-trigram features."""
+    words = text.split()
+    features = words + [text[i:i + 3] for i in range(max(1, len(text) - 2))]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def collapse_rows(header: List[str], rows: List[List[str]], row_indices: Optional[List[int]] = None,
+                  numeric_columns: Optional[List[str]] = None, max_hamming: int = 0,
+                  near_dup_column: str = NEAR_DUP_COLUMN, min_similarity: float = 0.8) -> List[dict]:
+    """
+    Group rows by text template.
+
+    The near-duplicate pass is off by default. With ``max_hamming > 0`` it only
+    compares the ``near_dup_column`` text of groups whose other text columns
+    are identical, and requires a character-trigram Jaccard similarity of at
+    least ``min_similarity`` on top of the SimHash distance.
+
+    Returns one dict per group with ``text`` (the representative row's text
+    columns), ``rows`` (original row indices) and ``numeric`` (column -> list
+    of values, aligned with ``rows``).
+    """
+    row_indices = row_indices if row_indices is not None else list(range(len(rows)))
+    numeric_columns = detect_numeric_columns(header, rows) if numeric_columns is None else numeric_columns
+    numeric_idx = [header.index(c) for c in numeric_columns if c in header]
+    text_idx = [i for i in range(len(header)) if i not in numeric_idx]
+
+    code_idx = [i for i in text_idx if CODE_COLUMN.search(header[i].strip())]
+    desc_idx = header.index(near_dup_column) if near_dup_column in header else None
+    if desc_idx in numeric_idx:
+        desc_idx = None
+
+    # 1. exact template hash
+    templates: Dict[str, int] = {}
+    groups: List[dict] = []
+    contexts: List[str] = []
+    descriptions: List[str] = []
+    for row_index, row in zip(row_indices, rows):
+        text = " | ".join(f"{header[i]}: {row[i].strip()}" for i in text_idx if i < len(row) and row[i].strip())
+        # Digits are masked in free text, but codes and years must match exactly
+        codes = "|".join(row[i].strip() for i in code_idx if i < len(row))
+        key = hashlib.sha1(f"{normalize_text(text)}\x1f{codes}".encode()).hexdigest()
+        if key not in templates:
+            templates[key] = len(groups)
+            groups.append({"text": text, "rows": [], "numeric": {header[i]: [] for i in numeric_idx}})
+            description = row[desc_idx] if desc_idx is not None and desc_idx < len(row) else ""
+            context = " | ".join(row[i].strip() for i in text_idx if i != desc_idx and i < len(row))
+            contexts.append(hashlib.sha1(f"{normalize_text(context)}\x1f{codes}".encode()).hexdigest())
+            descriptions.append(normalize_text(description))
+        group = groups[templates[key]]
+        group["rows"].append(row_index)
+        for i in numeric_idx:
+            group["numeric"][header[i]].append(_to_number(row[i]) if i < len(row) else None)
+
+    if max_hamming <= 0 or desc_idx is None or len(groups) < 2:
+        return groups
+
+    # 2. SimHash near-duplicates of the description within the same context;
+    # with max_hamming + 1 bands, any pair within max_hamming bits agrees
+    # exactly on at least one band.
+    bands = max_hamming + 1
+    band_bits = SIMHASH_BITS // bands
+    hashes = [simhash(d) for d in descriptions]
+    trigrams = [_trigrams(d) for d in descriptions]
+    uf = _UnionFind(len(groups))
+    for band in range(bands):
+        buckets: Dict[tuple, List[int]] = {}
+        mask = (1 << band_bits) - 1
+        for gi, h in enumerate(hashes):
+            buckets.setdefault((contexts[gi], (h >> (band * band_bits)) & mask), []).append(gi)
+        for members in buckets.values():
+            for a_pos, a in enumerate(members):
+                for b in members[a_pos + 1:]:
+                    if bin(hashes[a] ^ hashes[b]).count("1") > max_hamming:
+                        continue
+                    shared = len(trigrams[a] & trigrams[b]) / max(1, len(trigrams[a] | trigrams[b]))
+                    if shared >= min_similarity:
+                        uf.union(a, b)
+
+    merged: Dict[int, dict] = {}
+    for gi, group in enumerate(groups):
+        root = uf.find(gi)
+        if root not in merged:
+            merged[root] = group
+            continue
+        target = merged[root]
+        target["rows"].extend(group["rows"])
+        for col, values in group["numeric"].items():
+            target["numeric"][col].extend(values)
+    return list(merged.values())
+
+
+def group_metadata(group: dict, source: str, max_members: int = 500) -> dict:
+    """Flatten a group into Chroma-compatible scalar metadata."""
+    metadata = {
+        "source": source,
+        "member_count": len(group["rows"]),
+        "member_rows": json.dumps(group["rows"][:max_members]),
+    }
+    for col, values in group["numeric"].items():
+        numbers = [v for v in values if v is not None]
+        if numbers:
+            metadata[f"sum_{col}"] = float(sum(numbers))
+        metadata[f"values_{col}"] = json.dumps(values[:max_members])
+    return metadata
+
+
+def group_summary(group: dict) -> str:
+    """Short text line describing the collapsed members, for stores without metadata."""
+    parts = [f"Grouped rows: {len(group['rows'])}"]
+    for col, values in group["numeric"].items():
+        numbers = [v for v in values if v is not None]
+        if numbers:
+            parts.append(f"{col} total: {sum(numbers):,.2f}")
+    return " | ".join(parts)
+
+
+def read_csv_rows(file_path: str, max_rows: Optional[int] = None):
+    """Return ``(header, rows, row_indices)`` skipping blank rows, as ``upload_csv`` does."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows, indices = [], []
+        for i, row in enumerate(reader):
+            if max_rows and i >= max_rows:
+                break
+            if any(v.strip() for v in row):
+                rows.append(row)
+                indices.append(i)
+    return header, rows, indices
+
+
+def batched(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
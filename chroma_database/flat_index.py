@@ -0,0 +1,401 @@
+"""
+In-process NumPy flat index for small and medium corpora.
+
+``FlatIndexCollection`` implements the part of the Chroma collection API that
+``ChromaManager`` uses (``add``, ``upsert``, ``get``, ``query``, ``count``), so
+it can replace ``PersistentClient`` with ``ChromaManager(backend="flat")``.
+For a few hundred thousand chunks a query is just a matrix product, so this
+skips the client, serialization and SQLite round trips entirely.
+
+On-disk layout (one directory per collection):
+- ``vectors.npy``  L2-normalized float32 matrix, opened memory-mapped
+- ``vectors.log``  raw float32 rows appended since the last compaction
+- ``docs.sqlite3`` row -> id, document and metadata side store
+
+Vectors are written to the log before their rows are committed to SQLite, so
+after a crash any uncommitted tail of the log is simply truncated on open; a
+failed insert rolls the transaction back and truncates the log right away.
+
+Distances are squared L2 between unit vectors (``2 - 2 * cosine``), the same
+values Chroma's default ``l2`` space returns for normalized embeddings.
+
+Run ``python -m chroma_database.flat_index --rows 200000`` for a benchmark
+against the Chroma and LanceDB paths.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_INCLUDE = ["documents", "metadatas", "distances"]
+
+
+class DuplicateIDError(ValueError):
+    """Raised when one ``add``/``upsert`` call repeats an id, like Chroma's error of the same name."""
+
+
+def _check_unique(ids: List[str]):
+    seen, duplicates = set(), set()
+    for doc_id in ids:
+        if doc_id in seen:
+            duplicates.add(doc_id)
+        seen.add(doc_id)
+    if duplicates:
+        raise DuplicateIDError(f"Expected IDs to be unique, found duplicates of: {', '.join(sorted(duplicates))}")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class FlatIndexCollection:
+    def __init__(self, path: str, name: str = "flat", embedding_function=None,
+                 compact_every: int = 50000, chunk_rows: int = 65536):
+        os.makedirs(path, exist_ok=True)
+        self.name = name
+        self.path = path
+        self.compact_every = compact_every
+        self.chunk_rows = chunk_rows
+        self._ef = embedding_function
+        self._lock = threading.RLock()
+        self._base_path = os.path.join(path, "vectors.npy")
+        self._log_path = os.path.join(path, "vectors.log")
+        self._db = sqlite3.connect(os.path.join(path, "docs.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+        self._load()
+
+    # ── storage ──────────────────────────────────────────────────────────────
+    def _load(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim: Optional[int] = int(row[0]) if row else None
+        self._ids: List[str] = [r[0] for r in self._db.execute("SELECT id FROM docs ORDER BY row")]
+        self._rows: Dict[str, int] = {doc_id: i for i, doc_id in enumerate(self._ids)}
+
+        self._base = np.load(self._base_path, mmap_mode="r+") if os.path.exists(self._base_path) else None
+        n_base = 0 if self._base is None else self._base.shape[0]
+
+        self._log = np.empty((0, self.dim or 0), dtype=np.float32)
+        if self.dim and os.path.exists(self._log_path):
+            log = np.fromfile(self._log_path, dtype=np.float32).reshape(-1, self.dim)
+            committed = len(self._ids) - n_base
+            if log.shape[0] > committed:
+                # Rows written to the log but never committed to the side store.
+                log = log[:committed]
+                with open(self._log_path, "r+b") as f:
+                    f.truncate(log.nbytes)
+            self._log = np.ascontiguousarray(log)
+
+    def _ensure_dim(self, dim: int):
+        if self.dim is None:
+            self.dim = dim
+            self._log = np.empty((0, dim), dtype=np.float32)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+            self._db.commit()
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self.dim}")
+
+    def _embed(self, documents: Sequence[str]) -> np.ndarray:
+        if self._ef is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            self._ef = DefaultEmbeddingFunction()
+        return np.asarray(self._ef(list(documents)), dtype=np.float32)
+
+    def _vectors_for(self, documents, embeddings) -> np.ndarray:
+        vectors = self._embed(documents) if embeddings is None else embeddings
+        vectors = _normalize(vectors)
+        self._ensure_dim(vectors.shape[1])
+        return vectors
+
+    def _append(self, ids: List[str], vectors: np.ndarray, documents, metadatas):
+        start = len(self._ids)
+        log_size = os.path.getsize(self._log_path) if os.path.exists(self._log_path) else 0
+        with open(self._log_path, "ab") as f:
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO docs (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (start + i, doc_id,
+                         documents[i] if documents else None,
+                         json.dumps(metadatas[i], ensure_ascii=False) if metadatas and metadatas[i] else None)
+                        for i, doc_id in enumerate(ids)
+                    ],
+                )
+        except Exception:
+            # Drop the vectors of the rolled-back rows so the log matches the side store again.
+            with open(self._log_path, "r+b") as f:
+                f.truncate(log_size)
+            raise
+        self._log = np.concatenate([self._log, vectors])
+        for i, doc_id in enumerate(ids):
+            self._rows[doc_id] = start + i
+        self._ids.extend(ids)
+        if self._log.shape[0] >= self.compact_every:
+            self.compact()
+
+    def _update(self, rows: List[int], vectors: np.ndarray, documents, metadatas):
+        n_base = 0 if self._base is None else self._base.shape[0]
+        log_rows = [(row - n_base, vector) for row, vector in zip(rows, vectors) if row >= n_base]
+        for row, vector in zip(rows, vectors):
+            if row < n_base:
+                self._base[row] = vector
+        if self._base is not None:
+            self._base.flush()
+        if log_rows:
+            with open(self._log_path, "r+b") as log:
+                for log_row, vector in log_rows:
+                    self._log[log_row] = vector
+                    log.seek(log_row * vector.nbytes)
+                    log.write(vector.tobytes())
+        with self._db:
+            self._db.executemany(
+                "UPDATE docs SET document = COALESCE(?, document), metadata = COALESCE(?, metadata) WHERE row = ?",
+                [
+                    (documents[i] if documents else None,
+                     json.dumps(metadatas[i], ensure_ascii=False) if metadatas and metadatas[i] else None,
+                     row)
+                    for i, row in enumerate(rows)
+                ],
+            )
+
+    def compact(self):
+        """Fold the append log into ``vectors.npy``."""
+        with self._lock:
+            if self._log.shape[0] == 0:
+                return
+            parts = [self._log] if self._base is None else [np.asarray(self._base), self._log]
+            merged = np.concatenate(parts)
+            tmp_path = self._base_path + ".tmp.npy"
+            np.save(tmp_path, merged)
+            self._base = None
+            os.replace(tmp_path, self._base_path)
+            open(self._log_path, "wb").close()
+            self._base = np.load(self._base_path, mmap_mode="r+")
+            self._log = np.empty((0, self.dim), dtype=np.float32)
+
+    # ── Chroma-compatible API ────────────────────────────────────────────────
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids: List[str], documents: Optional[List[str]] = None, embeddings=None,
+            metadatas: Optional[List[dict]] = None):
+        """Add new records. Ids that already exist are skipped, like Chroma's ``add``."""
+        _check_unique(ids)
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+            if not keep:
+                return
+            ids = [ids[i] for i in keep]
+            documents = [documents[i] for i in keep] if documents else None
+            metadatas = [metadatas[i] for i in keep] if metadatas else None
+            embeddings = np.asarray(embeddings)[keep] if embeddings is not None else None
+            self._append(ids, self._vectors_for(documents, embeddings), documents, metadatas)
+
+    def upsert(self, ids: List[str], documents: Optional[List[str]] = None, embeddings=None,
+               metadatas: Optional[List[dict]] = None):
+        _check_unique(ids)
+        with self._lock:
+            vectors = self._vectors_for(documents, embeddings)
+            existing = [i for i, doc_id in enumerate(ids) if doc_id in self._rows]
+            new = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+            pick = lambda seq, idx: [seq[i] for i in idx] if seq else None
+            if existing:
+                self._update([self._rows[ids[i]] for i in existing], vectors[existing],
+                             pick(documents, existing), pick(metadatas, existing))
+            if new:
+                self._append([ids[i] for i in new], vectors[new], pick(documents, new), pick(metadatas, new))
+
+    def _fetch(self, rows: List[int]) -> Dict[int, tuple]:
+        found = {}
+        for start in range(0, len(rows), 900):
+            part = rows[start:start + 900]
+            query = f"SELECT row, document, metadata FROM docs WHERE row IN ({','.join('?' * len(part))})"
+            for row, document, metadata in self._db.execute(query, part):
+                found[row] = (document, json.loads(metadata) if metadata else None)
+        return found
+
+    def _vector_rows(self, rows: List[int]) -> np.ndarray:
+        n_base = 0 if self._base is None else self._base.shape[0]
+        return np.stack([self._base[r] if r < n_base else self._log[r - n_base] for r in rows]) \
+            if rows else np.empty((0, self.dim or 0), dtype=np.float32)
+
+    def get(self, ids: Optional[List[str]] = None, limit: Optional[int] = None, offset: Optional[int] = None,
+            include: Optional[List[str]] = None, where=None) -> dict:
+        if where:
+            raise NotImplementedError("The flat index backend does not support metadata filters")
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+            else:
+                start = offset or 0
+                stop = len(self._ids) if limit is None else min(len(self._ids), start + limit)
+                rows = list(range(start, stop))
+            fetched = self._fetch(rows) if ("documents" in include or "metadatas" in include) else {}
+            result = {"ids": [self._ids[r] for r in rows]}
+            if "documents" in include:
+                result["documents"] = [fetched[r][0] for r in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [fetched[r][1] for r in rows]
+            if "embeddings" in include:
+                result["embeddings"] = self._vector_rows(rows)
+            return result
+
+    def _segments(self):
+        if self._base is not None and self._base.shape[0]:
+            yield 0, self._base
+        if self._log.shape[0]:
+            yield 0 if self._base is None else self._base.shape[0], self._log
+
+    def search(self, queries: np.ndarray, k: int):
+        """Top-k ``(rows, scores)`` by cosine similarity for each row of ``queries``."""
+        m = queries.shape[0]
+        best_rows = np.empty((m, 0), dtype=np.int64)
+        best_scores = np.empty((m, 0), dtype=np.float32)
+
+        for seg_start, segment in self._segments():
+            for start in range(0, segment.shape[0], self.chunk_rows):
+                block = segment[start:start + self.chunk_rows]
+                scores = queries @ block.T
+                if block.shape[0] > k:
+                    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                    scores = np.take_along_axis(scores, part, axis=1)
+                else:
+                    part = np.broadcast_to(np.arange(block.shape[0]), scores.shape)
+                rows = part + seg_start + start
+
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_rows = np.concatenate([best_rows, rows], axis=1)
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def query(self, query_texts: Optional[List[str]] = None, query_embeddings=None, n_results: int = 10,
+              include: Optional[List[str]] = None, where=None) -> dict:
+        if where:
+            raise NotImplementedError("The flat index backend does not support metadata filters")
+        include = DEFAULT_INCLUDE if include is None else include
+        queries = _normalize(self._embed(query_texts) if query_embeddings is None else query_embeddings)
+
+        with self._lock:
+            k = min(n_results, len(self._ids))
+            if k == 0:
+                rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+                scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+            else:
+                rows, scores = self.search(queries, k)
+            flat_rows = sorted(set(rows.ravel().tolist()))
+            fetched = self._fetch(flat_rows) if ("documents" in include or "metadatas" in include) else {}
+            ids = [[self._ids[r] for r in q_rows] for q_rows in rows.tolist()]
+
+        result = {"ids": ids}
+        if "documents" in include:
+            result["documents"] = [[fetched[r][0] for r in q_rows] for q_rows in rows.tolist()]
+        if "metadatas" in include:
+            result["metadatas"] = [[fetched[r][1] for r in q_rows] for q_rows in rows.tolist()]
+        if "distances" in include:
+            result["distances"] = np.maximum(2.0 - 2.0 * scores, 0.0).tolist()
+        if "embeddings" in include:
+            result["embeddings"] = [self._vector_rows(q_rows) for q_rows in rows.tolist()]
+        return result
+
+
+def benchmark(rows: int = 200000, dim: int = 384, queries: int = 100, k: int = 5, batch: int = 5000):
+    """Time single and batched top-k queries on the flat, Chroma and LanceDB paths."""
+    rng = np.random.default_rng(0)
+    corpus = _normalize(rng.standard_normal((rows, dim)))
+    probes = _normalize(rng.standard_normal((queries, dim)))
+    ids = [f"doc_{i}" for i in range(rows)]
+    docs = [f"document {i}" for i in range(rows)]
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = FlatIndexCollection(os.path.join(tmp, "flat"), compact_every=rows + 1)
+        start = time.time()
+        for i in range(0, rows, batch):
+            flat.add(ids=ids[i:i + batch], documents=docs[i:i + batch], embeddings=corpus[i:i + batch])
+        flat.compact()
+        build = time.time() - start
+        start = time.time()
+        for q in probes:
+            flat.query(query_embeddings=q[None, :], n_results=k)
+        single = time.time() - start
+        start = time.time()
+        flat.query(query_embeddings=probes, n_results=k)
+        timings["flat"] = (build, single, time.time() - start)
+
+        try:
+            import chromadb
+
+            client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+            collection = client.create_collection("bench")
+            start = time.time()
+            for i in range(0, rows, batch):
+                collection.add(ids=ids[i:i + batch], documents=docs[i:i + batch], embeddings=corpus[i:i + batch])
+            build = time.time() - start
+            start = time.time()
+            for q in probes:
+                collection.query(query_embeddings=[q.tolist()], n_results=k)
+            single = time.time() - start
+            start = time.time()
+            collection.query(query_embeddings=probes.tolist(), n_results=k)
+            timings["chroma"] = (build, single, time.time() - start)
+        except ImportError:
+            print("chromadb not installed, skipping")
+
+        try:
+            import lancedb
+            import pyarrow as pa
+
+            db = lancedb.connect(os.path.join(tmp, "lance"))
+            start = time.time()
+            table = db.create_table("bench", data=pa.table({
+                "id": ids, "text": docs,
+                "vector": pa.FixedSizeListArray.from_arrays(pa.array(corpus.ravel()), dim),
+            }))
+            build = time.time() - start
+            start = time.time()
+            for q in probes:
+                table.search(q).limit(k).to_list()
+            single = time.time() - start
+            timings["lancedb"] = (build, single, float("nan"))
+        except ImportError:
+            print("lancedb not installed, skipping")
+
+    print(f"{rows} rows x {dim} dims, {queries} queries, k={k}")
+    for name, (build, single, batched) in timings.items():
+        print(f"{name:>8}: build {build:.2f}s | {1000 * single / queries:.2f} ms/query single | "
+              f"{1000 * batched / queries:.2f} ms/query batched")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the flat index against Chroma and LanceDB")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.rows, args.dim, args.queries, args.k)
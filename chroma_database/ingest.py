@@ -0,0 +1,280 @@
+"""
+Resumable, checkpointed background ingest jobs.
+
+Each job persists a JSON checkpoint under ``<persist_dir>/jobs`` after every
+committed batch: the byte offset reached in the CSV (or the next PDF page),
+the row index and the number of the last committed batch. Document ids are
+deterministic (the same ``<file>_row_<i>`` ids as ``upload_csv``) and batches
+are written with ``upsert``, so replaying a batch after a crash is harmless.
+
+A failed batch is retried with exponential backoff. If it still fails, the
+job is marked ``failed`` and ``resume(job_id)`` continues from the last
+checkpoint instead of starting over.
+
+Example:
+    >>> jobs = IngestJobManager(ChromaManager())
+    >>> job_id = jobs.submit_csv("./data/mx_bud_2020.csv")
+    >>> jobs.status(job_id)["progress"]
+"""
+import csv
+import io
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ACTIVE = ("pending", "running")
+
+
+def _iter_csv_records(path: str, start_offset: int = 0) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Yield ``(end_byte_offset, row)`` for each CSV record after ``start_offset``.
+
+    Records are read as raw lines and joined until their quotes balance, so a
+    quoted field containing newlines still yields a single row and the byte
+    offset after it is exact.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        pending = b""
+        for line in iter(f.readline, b""):
+            pending += line
+            if pending.count(b'"') % 2:
+                continue
+            text = pending.decode("utf-8", errors="replace")
+            pending = b""
+            for row in csv.reader(io.StringIO(text)):
+                yield f.tell(), row
+
+
+def chroma_sink(collection) -> Callable[[List[str], List[str], Optional[List[dict]]], None]:
+    def commit(ids, texts, metadatas=None):
+        collection.upsert(ids=ids, documents=texts, metadatas=metadatas)
+    return commit
+
+
+def lancedb_sink(table) -> Callable[[List[str], List[str], Optional[List[dict]]], None]:
+    """Idempotent sink for a LanceDB table with an embedding function (``id``/``text`` columns)."""
+    def commit(ids, texts, metadatas=None):
+        rows = [{"id": doc_id, "text": text} for doc_id, text in zip(ids, texts)]
+        table.merge_insert("id").when_matched_update_all().when_not_matched_insert_all().execute(rows)
+    return commit
+
+
+class IngestJobManager:
+    def __init__(self, db, jobs_dir: Optional[str] = None, max_workers: int = 1,
+                 max_retries: int = 5, backoff: float = 2.0, sink: Optional[Callable] = None):
+        self.db = db
+        self.jobs_dir = jobs_dir or os.path.join(getattr(db, "persist_dir", "./chroma_database"), "jobs")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sink = sink or chroma_sink(db.collection)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, dict] = {}
+        self._cancel = set()
+        self._load_jobs()
+
+    # ── persistence ─────────────────────────────────────────────────────────
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _load_jobs(self):
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.jobs_dir, name), "r", encoding="utf-8") as f:
+                job = json.load(f)
+            if job["status"] in ACTIVE:
+                # The process died while this job was running.
+                job["status"] = "interrupted"
+            self._jobs[job["id"]] = job
+
+    def _save(self, job: dict):
+        job["updated_at"] = time.time()
+        tmp = self._job_path(job["id"]) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._job_path(job["id"]))
+
+    # ── public API ──────────────────────────────────────────────────────────
+    def submit_csv(self, file_path: str, batch_size: int = 1000, max_rows: Optional[int] = None) -> str:
+        return self._submit({
+            "kind": "csv",
+            "path": os.path.abspath(file_path),
+            "batch_size": batch_size,
+            "max_rows": max_rows,
+            "total": os.path.getsize(file_path),
+            "byte_offset": 0,
+        })
+
+    def submit_pdf(self, file_path: str, batch_size: int = 32) -> str:
+        import pypdf
+
+        with open(file_path, "rb") as f:
+            total = len(pypdf.PdfReader(f).pages)
+        return self._submit({
+            "kind": "pdf",
+            "path": os.path.abspath(file_path),
+            "batch_size": batch_size,
+            "total": total,
+        })
+
+    def _submit(self, spec: dict) -> str:
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "pending",
+            "row_index": 0,
+            "uploaded": 0,
+            "last_batch": -1,
+            "retries": 0,
+            "error": None,
+            "created_at": time.time(),
+            **spec,
+        }
+        with self._lock:
+            self._jobs[job["id"]] = job
+        self._save(job)
+        self._executor.submit(self._run, job["id"])
+        return job["id"]
+
+    def resume(self, job_id: str) -> str:
+        """Restart a failed, interrupted or cancelled job from its last checkpoint."""
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["status"] in ACTIVE or job["status"] == "done":
+                return job["status"]
+            job["status"] = "pending"
+            job["error"] = None
+            self._cancel.discard(job_id)
+        self._save(job)
+        self._executor.submit(self._run, job_id)
+        return "pending"
+
+    def resume_incomplete(self) -> List[str]:
+        """Resume every job that was interrupted by a crash or restart."""
+        resumed = [job_id for job_id, job in list(self._jobs.items()) if job["status"] == "interrupted"]
+        for job_id in resumed:
+            self.resume(job_id)
+        return resumed
+
+    def cancel(self, job_id: str):
+        with self._lock:
+            self._cancel.add(job_id)
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            job = dict(self._jobs[job_id])
+        if job["kind"] == "csv":
+            done = job["byte_offset"]
+        else:
+            done = job["row_index"]
+        job["progress"] = round(done / job["total"], 4) if job["total"] else 1.0
+        return job
+
+    def list_jobs(self) -> List[dict]:
+        return sorted((self.status(job_id) for job_id in list(self._jobs)),
+                      key=lambda j: j["created_at"], reverse=True)
+
+    # ── execution ───────────────────────────────────────────────────────────
+    def _commit_with_retry(self, job: dict, ids: List[str], texts: List[str],
+                           metadatas: Optional[List[dict]] = None):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sink(ids, texts, metadatas)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+                job["retries"] += 1
+                job["error"] = f"retry {attempt + 1}/{self.max_retries}: {e}"
+                print(f"Ingest job {job['id']}: batch failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _cancelled(self, job: dict) -> bool:
+        with self._lock:
+            return job["id"] in self._cancel
+
+    def _checkpoint(self, job: dict, ids: List[str], next_index: int, byte_offset: Optional[int] = None):
+        job["row_index"] = next_index
+        if ids:
+            job["uploaded"] += len(ids)
+            job["last_batch"] += 1
+        if byte_offset is not None:
+            job["byte_offset"] = byte_offset
+        self._save(job)
+
+    def _run(self, job_id: str):
+        job = self._jobs[job_id]
+        job["status"] = "running"
+        self._save(job)
+        start = time.time()
+        try:
+            finished = self._run_csv(job) if job["kind"] == "csv" else self._run_pdf(job)
+            job["status"] = "done" if finished else "cancelled"
+            job["error"] = None
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        self._save(job)
+        print(f"Ingest job {job_id} {job['status']} after {time.time() - start:.2f}s "
+              f"({job['uploaded']} documents, checkpoint row {job['row_index']})")
+
+    def _run_csv(self, job: dict) -> bool:
+        records = _iter_csv_records(job["path"])
+        header_end, header = next(records)
+        records.close()
+        offset = max(job["byte_offset"], header_end)
+        index = job["row_index"]
+        name = os.path.basename(job["path"])
+        texts, ids = [], []
+
+        for end, row in _iter_csv_records(job["path"], offset):
+            if self._cancelled(job):
+                return False
+            if job["max_rows"] and index >= job["max_rows"]:
+                break
+            if any(v.strip() for v in row):
+                texts.append(" | ".join(f"{h}: {v.strip()}" for h, v in zip(header, row)))
+                ids.append(f"{name}_row_{index}")
+            index += 1
+            offset = end
+            if len(texts) >= job["batch_size"]:
+                self._commit_with_retry(job, ids, texts)
+                self._checkpoint(job, ids, index, offset)
+                texts, ids = [], []
+
+        if texts:
+            self._commit_with_retry(job, ids, texts)
+        self._checkpoint(job, ids, index, os.path.getsize(job["path"]))
+        return True
+
+    def _run_pdf(self, job: dict) -> bool:
+        import pypdf
+
+        name = os.path.basename(job["path"])
+        with open(job["path"], "rb") as f:
+            reader = pypdf.PdfReader(f)
+            for start in range(job["row_index"], job["total"], job["batch_size"]):
+                if self._cancelled(job):
+                    return False
+                stop = min(start + job["batch_size"], job["total"])
+                texts, ids, metadatas = [], [], []
+                for i in range(start, stop):
+                    text = reader.pages[i].extract_text() or ""
+                    if text.strip():
+                        texts.append(text)
+                        ids.append(f"{name}_page_{i}")
+                        metadatas.append({"source": name, "page": i})
+                if texts:
+                    self._commit_with_retry(job, ids, texts, metadatas)
+                self._checkpoint(job, ids, stop)
+        return True
@@ -0,0 +1,188 @@
+"""
+Storage maintenance for the LanceDB and Chroma stores.
+
+Every ``setup_lancedb()`` run and every small ``table.add``/``collection.add``
+leaves new versions and fragments behind, so ``./db`` and
+``./chroma_database`` grow and scans slow down. This module:
+- compacts LanceDB fragments, prunes old versions and optimizes indexes
+- checkpoints the WAL, then VACUUMs and ANALYZEs the Chroma SQLite store
+- reports size and probe-query latency before and after
+
+Usage:
+    python -m chroma_database.maintenance --lancedb ./db --chroma ./chroma_database
+
+Set ``RAG_MAINTENANCE_HOURS`` to have ``app.py`` run it periodically.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _latency_ms(probe: Optional[Callable[[], object]], repeats: int = 20) -> Optional[float]:
+    if probe is None:
+        return None
+    probe()  # warm-up
+    start = time.time()
+    for _ in range(repeats):
+        probe()
+    return round(1000 * (time.time() - start) / repeats, 3)
+
+
+def _lancedb_probe(table) -> Optional[Callable[[], object]]:
+    try:
+        vector = np.asarray(table.search().limit(1).to_list()[0]["vector"], dtype=np.float32)
+    except Exception:
+        return None
+    return lambda: table.search(vector).limit(5).to_list()
+
+
+def _chroma_probe(collection) -> Optional[Callable[[], object]]:
+    sample = collection.get(limit=1, include=["embeddings"])
+    if not sample["ids"]:
+        return None
+    vector = np.asarray(sample["embeddings"][0], dtype=np.float32).tolist()
+    return lambda: collection.query(query_embeddings=[vector], n_results=5)
+
+
+def maintain_lancedb(db_path: str = "./db", table_names: Optional[List[str]] = None,
+                     older_than_days: float = 7) -> Dict[str, dict]:
+    """Compact, prune versions older than ``older_than_days`` and optimize indexes."""
+    import lancedb
+
+    db = lancedb.connect(db_path)
+    older_than = timedelta(days=older_than_days)
+    report = {}
+    for name in table_names or db.table_names():
+        table = db.open_table(name)
+        probe = _lancedb_probe(table)
+        entry = {"size_before": dir_size(os.path.join(db_path, f"{name}.lance")),
+                 "latency_ms_before": _latency_ms(probe)}
+        start = time.time()
+        try:
+            if hasattr(table, "optimize"):
+                table.optimize(cleanup_older_than=older_than)
+            else:
+                table.compact_files()
+                table.cleanup_old_versions(older_than)
+            entry["status"] = "ok"
+        except Exception as e:
+            entry["status"] = f"error: {e}"
+        entry["seconds"] = round(time.time() - start, 2)
+        entry["size_after"] = dir_size(os.path.join(db_path, f"{name}.lance"))
+        entry["latency_ms_after"] = _latency_ms(probe)
+        report[name] = entry
+    return report
+
+
+def maintain_chroma(persist_dir: str = "./chroma_database", collection=None) -> dict:
+    """
+    Checkpoint the WAL, then VACUUM and ANALYZE ``chroma.sqlite3``.
+
+    VACUUM needs exclusive access; if a writer holds the database the error is
+    reported and the next scheduled run tries again.
+    """
+    path = os.path.join(persist_dir, "chroma.sqlite3")
+    probe = _chroma_probe(collection) if collection is not None else None
+    entry = {"size_before": dir_size(persist_dir), "latency_ms_before": _latency_ms(probe)}
+    start = time.time()
+    try:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+        entry["status"] = "ok"
+    except sqlite3.Error as e:
+        entry["status"] = f"error: {e}"
+    entry["seconds"] = round(time.time() - start, 2)
+    entry["size_after"] = dir_size(persist_dir)
+    entry["latency_ms_after"] = _latency_ms(probe)
+    return entry
+
+
+def run_maintenance(lancedb_path: Optional[str] = "./db", chroma_dir: Optional[str] = "./chroma_database",
+                    older_than_days: float = 7, collection=None) -> dict:
+    report = {}
+    if lancedb_path and os.path.isdir(lancedb_path):
+        report["lancedb"] = maintain_lancedb(lancedb_path, older_than_days=older_than_days)
+    if chroma_dir and os.path.exists(os.path.join(chroma_dir, "chroma.sqlite3")):
+        report["chroma"] = maintain_chroma(chroma_dir, collection=collection)
+    return report
+
+
+class MaintenanceScheduler:
+    """Run ``run_maintenance`` every ``interval_hours`` on a daemon thread."""
+
+    def __init__(self, interval_hours: float, **kwargs):
+        self.interval = interval_hours * 3600
+        self.kwargs = kwargs
+        self.last_report: Optional[dict] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="storage-maintenance", daemon=True)
+
+    @classmethod
+    def from_env(cls, var: str = "RAG_MAINTENANCE_HOURS", **kwargs) -> Optional["MaintenanceScheduler"]:
+        value = os.environ.get(var, "").strip()
+        if not value:
+            return None
+        return cls(float(value), **kwargs)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_report = run_maintenance(**self.kwargs)
+                print(f"Storage maintenance: {json.dumps(self.last_report)}")
+            except Exception as e:
+                print(f"Storage maintenance failed: {e}")
+
+    def start(self) -> "MaintenanceScheduler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact LanceDB and vacuum the Chroma store")
+    parser.add_argument("--lancedb", default="./db", help="LanceDB directory ('' to skip)")
+    parser.add_argument("--chroma", default="./chroma_database", help="Chroma persist dir ('' to skip)")
+    parser.add_argument("--collection", default="RAGTutorial", help="Chroma collection used for latency probes")
+    parser.add_argument("--older-than-days", type=float, default=7)
+    args = parser.parse_args()
+
+    collection = None
+    if args.chroma and os.path.exists(os.path.join(args.chroma, "chroma.sqlite3")):
+        import chromadb
+        try:
+            collection = chromadb.PersistentClient(path=args.chroma).get_collection(args.collection)
+        except Exception:
+            collection = None
+
+    report = run_maintenance(args.lancedb or None, args.chroma or None, args.older_than_days, collection)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
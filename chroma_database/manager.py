@@ -1,5 +1,6 @@
 import os
 import csv
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 import chromadb
@@ -8,13 +9,70 @@ import pypdf
 from typing import List, Tuple, Optional
 import time
 from chromadb.utils.embedding_functions import OllamaEmbeddingFunction
-from duckduckgo_search import DDGS
+from .web_search import CachedSearchProvider, DuckDuckGoProvider, SearchProvider
+from .adaptive import DENSE_DISTANCE, MAX_DISTANCE, MAX_GAP, NO_CONTEXT_ANSWER, adaptive_retrieve
+from .batch import answer_questions
+from .chat import ChatSession
+from .dedup import batched, collapse_rows, group_metadata, group_summary, read_csv_rows
+from .flat_index import FlatIndexCollection
+from .router import ModelRouter
+from .summaries import SummaryIndex, pdf_sections
 
 class ChromaManager:
-    def __init__(self, persist_dir: str = "./chroma_database", collection_name: str = "RAGTutorial"):
+    def __init__(self, persist_dir: str = "./chroma_database", collection_name: str = "RAGTutorial",
+                 search_provider: Optional[SearchProvider] = None, chat_model: str = "myqwen3",
+                 router: Optional[ModelRouter] = None, backend: str = "chroma",
+                 embedding_function=None, relevance_threshold: Optional[float] = MAX_DISTANCE,
+                 score_gap: Optional[float] = MAX_GAP, dense_threshold: Optional[float] = DENSE_DISTANCE,
+                 max_results: Optional[int] = None):
         os.makedirs(persist_dir, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=persist_dir)
-        self.collection = self.client.get_or_create_collection(collection_name)
+        self.persist_dir = persist_dir
+        self.backend = backend
+        # None keeps Chroma's default; pass e.g. OnnxEmbedder(model_dir) to embed in-process
+        self.embedding_function = embedding_function
+        # Recorded in snapshots and checked on import; Chroma's default embedder is all-MiniLM-L6-v2
+        self.embedding_model = (
+            getattr(embedding_function, "model_name", None) or type(embedding_function).__name__
+            if embedding_function is not None else "all-MiniLM-L6-v2"
+        )
+        if backend == "chroma":
+            self.client = chromadb.PersistentClient(path=persist_dir)
+        elif backend == "flat":
+            self.client = None
+        else:
+            raise ValueError(f"Unknown backend '{backend}', expected 'chroma' or 'flat'")
+        self.collection_name = collection_name
+        self.collection = self._open_collection(collection_name)
+        # Created on first use so callers that never summarize don't get an extra collection
+        self._summaries = None
+        self._summaries_lock = threading.Lock()
+        self.chat_model = chat_model
+        self.router = router
+        # Adaptive retrieval: drop documents past the distance threshold or a
+        # score gap, and grow k up to max_results (default 2 * n_results) only
+        # while the k-th result is still within dense_threshold.
+        self.relevance_threshold = relevance_threshold
+        self.score_gap = score_gap
+        self.dense_threshold = dense_threshold
+        self.max_results = max_results
+        self.search_provider = search_provider or CachedSearchProvider(
+            DuckDuckGoProvider(),
+            cache_path=os.path.join(persist_dir, "web_cache.sqlite3"),
+        )
+
+    def _open_collection(self, name: str):
+        if self.backend == "flat":
+            return FlatIndexCollection(os.path.join(self.persist_dir, "flat", name), name, self.embedding_function)
+        if self.embedding_function is not None:
+            return self.client.get_or_create_collection(name, embedding_function=self.embedding_function)
+        return self.client.get_or_create_collection(name)
+
+    @property
+    def summaries(self) -> SummaryIndex:
+        with self._summaries_lock:
+            if self._summaries is None:
+                self._summaries = SummaryIndex(self, self._open_collection(f"{self.collection_name}_summaries"))
+            return self._summaries
 
     def _create_doc_id(self, source: str, identifier: str) -> str:
         return f"{os.path.basename(source)}_{identifier}"
@@ -60,10 +118,42 @@ class ChromaManager:
         return (processed, uploaded)
 
 
-    def upload_pdf(self, file_path: str) -> Tuple[int, int]:
+    def upload_csv_collapsed(self, file_path: str, max_rows: Optional[int] = None, batch_size: int = 1000,
+                             max_hamming: int = 0) -> Tuple[int, int]:
+        """Embed one representative per group of near-duplicate rows. Returns (rows, groups uploaded)."""
+        start_total = time.time()
+        header, rows, indices = read_csv_rows(file_path, max_rows)
+        groups = collapse_rows(header, rows, indices, max_hamming=max_hamming)
+        print(f"Collapsed {len(rows)} rows into {len(groups)} groups in {time.time() - start_total:.2f}s")
+
+        source = os.path.basename(file_path)
+        uploaded = 0
+        for batch in batched(groups, batch_size):
+            start_batch = time.time()
+            self.collection.upsert(
+                # The amounts only live in the summary line once the numeric columns are split off
+                documents=[f"{g['text']}\n{group_summary(g)}" for g in batch],
+                ids=[self._create_doc_id(file_path, f"group_{g['rows'][0]}") for g in batch],
+                metadatas=[group_metadata(g, source) for g in batch],
+            )
+            print(f"Uploaded batch of {len(batch)} in {time.time() - start_batch:.2f}s")
+            uploaded += len(batch)
+
+        print(f"\nTotal time: {time.time() - start_total:.2f}s")
+        return (len(rows), uploaded)
+
+    def upload_pdf(self, file_path: str, summarize: bool = False) -> Tuple[int, int]:
+        """
+        Upload the pages of a PDF. With ``summarize=True`` section and document
+        summaries are built in the background for ``query_hierarchical``.
+        """
         existing_ids = set(self.collection.get()["ids"])
         uploaded = 0
 
+        texts, ids, metadatas = [], [], []
+        pages = {}
+        source = os.path.basename(file_path)
+
         with open(file_path, "rb") as f:
             reader = pypdf.PdfReader(f)
             total = len(reader.pages)
@@ -71,44 +161,106 @@ class ChromaManager:
             for i, page in enumerate(reader.pages):
                 text = page.extract_text() or ""
                 doc_id = self._create_doc_id(file_path, f"page_{i}")
+                pages[i] = text
 
                 if text.strip() and doc_id not in existing_ids:
-                    self.collection.add(documents=[text], ids=[doc_id])
-                    uploaded += 1
+                    texts.append(text)
+                    ids.append(doc_id)
+                    metadatas.append({"source": source, "page": i})
+
+            sections = pdf_sections(reader) if summarize else []
+
+        # One add per document instead of per page keeps storage fragments down
+        if texts:
+            self.collection.add(documents=texts, ids=ids, metadatas=metadatas)
+            uploaded = len(texts)
+
+        if summarize:
+            self.summaries.submit(file_path, pages, sections)
 
         return (total, uploaded)
 
+    def _build_messages(self, question: str, documents: List[str]) -> List[dict]:
+        context = "\n\n".join([
+            f"SOURCE {i+1}:\n{text}"
+            for i, text in enumerate(documents)
+        ])
+        return [
+            {"role": "system", "content": "Answer using ONLY the provided context"},
+            {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
+        ]
+
+    def generate(self, question: str, documents: List[str], distances: Optional[List[float]] = None) -> str:
+        messages = self._build_messages(question, documents)
+        if self.router:
+            answer, _ = self.router.answer(messages, question, distances)
+            return answer
+        response = ollama.chat(model=self.chat_model, messages=messages)
+        return response["message"]["content"]
+
     def query(self, question: str, n_results: int = 5) -> Tuple[str, List[str]]:
         try:
-            results = self.collection.query(
-                query_texts=[question],
-                n_results=n_results
+            documents, distances = adaptive_retrieve(
+                self.collection,
+                question,
+                k=n_results,
+                max_k=max(n_results, self.max_results) if self.max_results else None,
+                max_distance=self.relevance_threshold,
+                max_gap=self.score_gap,
+                dense_distance=self.dense_threshold,
             )
+            if not documents:
+                # Nothing relevant: skip the LLM call entirely
+                return NO_CONTEXT_ANSWER, []
+            return self.generate(question, documents, distances), documents
 
-            context = "\n\n".join([
-                f"SOURCE {i+1}:\n{text}"
-                for i, text in enumerate(results["documents"][0])
-            ])
-
-            response = ollama.chat(
-                model="myqwen3",
-                messages=[
-                    {"role": "system", "content": "Answer using ONLY the provided context"},
-                    {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
-                ]
-            )
+        except Exception as e:
+            return f"Error: {str(e)}", []
 
-            return response["message"]["content"], results["documents"][0]
+    def query_hierarchical(self, question: str, n_summaries: int = 3, drill_down_pages: int = 3) -> Tuple[str, List[str]]:
+        """Answer from section/document summaries, drilling down into pages only when needed."""
+        try:
+            documents, distances, _ = self.summaries.retrieve(question, n_summaries, drill_down_pages)
+            if not documents:
+                return self.query(question)
+            return self.generate(question, documents, distances), documents
 
         except Exception as e:
             return f"Error: {str(e)}", []
 
-    def search_web(self, query: str, num_results: int = 5):
-        """Use DuckDuckGo to search the web and return result snippets."""
-        with DDGS() as ddgs:
-            results = ddgs.text(query, region='wt-wt', safesearch='moderate', max_results=num_results)
-            return [r["body"] for r in results]
-        
+    def answer_batch(self, questions: List[str], n_results: int = 5, max_workers: int = 4,
+                     output_path: Optional[str] = None) -> List[dict]:
+        """Answer many questions with one batched retrieval and concurrent generation, in input order."""
+        results = answer_questions(self, questions, n_results=n_results,
+                                   max_workers=max_workers, output_path=output_path)
+        return sorted(results, key=lambda r: r["index"])
+
+    def start_chat(self, **kwargs) -> ChatSession:
+        """Open a multi-turn session that reuses the model server's prompt cache."""
+        return ChatSession(self, **kwargs)
+
+    def export_snapshot(self, path: str, model_name: Optional[str] = None) -> int:
+        """Write ids, documents, metadata and vectors to an .arrow/.parquet snapshot."""
+        from .snapshot import export_collection  # pyarrow is only needed for snapshots
+
+        return export_collection(self.collection, path, model_name=model_name or self.embedding_model)
+
+    def import_snapshot(self, path: str, batch_size: int = 5000, model_name: Optional[str] = None,
+                        force: bool = False) -> int:
+        """Restore a snapshot into the collection without re-embedding. Rejects other models unless ``force``."""
+        from .snapshot import import_to_collection
+
+        return import_to_collection(self.collection, path, batch_size=batch_size,
+                                    model_name=model_name or self.embedding_model, force=force)
+
+    def search_web(self, query: str, num_results: int = 5) -> List[str]:
+        """Search the web through the configured provider and return result snippets."""
+        try:
+            return self.search_provider.search(query, num_results)
+        except Exception as e:
+            print(f"Web search failed: {e}")
+            return []
+
     def query_with_web(self, query: str):
         """Combine local RAG with web search context."""
         # Local search
@@ -0,0 +1,147 @@
+"""
+In-process CPU embedding engine (ONNX Runtime) as an alternative to Ollama.
+
+Every embedding otherwise goes over HTTP to Ollama as JSON text. ``OnnxEmbedder``
+loads a nomic-embed-text-compatible export from disk instead:
+
+    model_dir/
+        model.onnx       (e.g. from nomic-ai/nomic-embed-text-v1.5 "onnx/")
+        tokenizer.json
+
+Texts are tokenized, sorted by length and batched so each batch is only
+padded to its own longest sequence. ONNX Runtime's intra-op thread pool is
+sized to the CPU cores, and embeddings come back as a float32 NumPy array.
+
+It implements the interfaces both stores use:
+- Chroma embedding functions: ``embedder(input=[...])``
+- ``setup_local_db.LocalEmbeddingFunction``: ``embedder("text")``,
+  ``generate_embeddings``, ``ndims``
+- LangChain embeddings: ``embed_documents`` / ``embed_query``
+
+Run ``python -m chroma_database.onnx_embedder MODEL_DIR`` for a throughput
+benchmark against the Ollama path.
+"""
+import argparse
+import os
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+
+
+class OnnxEmbedder:
+    def __init__(self, model_dir: str, max_length: int = 512, batch_size: int = 32,
+                 threads: Optional[int] = None, document_prefix: str = "", query_prefix: str = ""):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = os.path.basename(os.path.normpath(model_dir))
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.document_prefix = document_prefix
+        self.query_prefix = query_prefix
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.ndims = self.embed_batch(["probe"]).shape[1]
+
+    def _run(self, encodings) -> np.ndarray:
+        length = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), length), dtype=np.int64)
+        attention = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, e in enumerate(encodings):
+            input_ids[row, :len(e.ids)] = e.ids
+            attention[row, :len(e.ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        output = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        if output.ndim == 3:
+            # Mean pooling over real (unpadded) tokens
+            mask = attention[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def embed_batch(self, texts: List[str], prefix: str = "") -> np.ndarray:
+        """Embed ``texts`` with length-bucketed, dynamically padded batches."""
+        if not texts:
+            return np.empty((0, getattr(self, "ndims", 0)), dtype=np.float32)
+        encodings = self.tokenizer.encode_batch([prefix + t for t in texts])
+        order = np.argsort([len(e.ids) for e in encodings], kind="stable")
+        result = None
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vectors = self._run([encodings[i] for i in idx])
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[idx] = vectors
+        return result
+
+    # Chroma EmbeddingFunction / setup_local_db.LocalEmbeddingFunction
+    def __call__(self, input: Union[str, List[str]]):
+        if isinstance(input, str):
+            return self.embed_batch([input], self.query_prefix)[0]
+        return self.embed_batch(list(input), self.document_prefix)
+
+    def generate_embeddings(self, texts: Union[str, List[str]]) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        return self.embed_batch(list(texts), self.document_prefix)
+
+    # LangChain Embeddings
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_batch(texts, self.document_prefix).tolist()
+
+    def embed_query(self, text: Optional[str] = None, input: Optional[List[str]] = None):
+        # Chroma calls embed_query(input=[...]) for query texts; LangChain passes one string.
+        if input is not None:
+            return self.embed_batch(list(input), self.query_prefix)
+        return self.embed_batch([text], self.query_prefix)[0].tolist()
+
+
+def benchmark(model_dir: str, n_texts: int = 512, ollama_model: str = "nomic-embed-text"):
+    """Texts/second for the in-process embedder versus Ollama's HTTP endpoint."""
+    rng = np.random.default_rng(0)
+    words = ["presupuesto", "educación", "salud", "programa", "monto", "aprobado", "ramo",
+             "partida", "servicios", "personal", "2020", "federal", "gasto", "inversión"]
+    texts = [" ".join(rng.choice(words, size=rng.integers(5, 120))) for _ in range(n_texts)]
+
+    embedder = OnnxEmbedder(model_dir)
+    start = time.time()
+    embedder(texts)
+    onnx_s = time.time() - start
+    print(f"onnx   : {n_texts / onnx_s:8.1f} texts/s ({onnx_s:.2f}s, dim {embedder.ndims})")
+
+    try:
+        import ollama
+
+        start = time.time()
+        for i in range(0, n_texts, 32):
+            ollama.embed(model=ollama_model, input=texts[i:i + 32])
+        ollama_s = time.time() - start
+        print(f"ollama : {n_texts / ollama_s:8.1f} texts/s ({ollama_s:.2f}s)")
+        print(f"speedup: {ollama_s / onnx_s:.1f}x")
+    except Exception as e:
+        print(f"Ollama benchmark skipped: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the in-process ONNX embedder against Ollama")
+    parser.add_argument("model_dir")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--ollama-model", default="nomic-embed-text")
+    args = parser.parse_args()
+    benchmark(args.model_dir, args.texts, args.ollama_model)
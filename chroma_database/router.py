@@ -0,0 +1,129 @@
+"""
+Cascade routing across the local Ollama models.
+
+Simple lookups go to the smallest model. A question is escalated to the next
+model in the cascade when a cheap confidence check fails:
+- the question looks complex (comparisons, aggregates, long multi-part asks)
+- retrieval was weak: even the best document is not a close match (best
+  distance above ``max_distance``, by default the adaptive retriever's
+  ``DENSE_DISTANCE``, which sits below the relevance threshold that already
+  filtered the documents)
+- the answer is empty or hedged ("I don't know", "not provided"...)
+
+The cascade is configured with the ``RAG_MODELS`` environment variable, e.g.
+``RAG_MODELS=myqwen3,llama3.2``, or by passing ``models`` directly.
+"""
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ollama
+
+from .adaptive import DENSE_DISTANCE
+
+DEFAULT_MODELS = ["myqwen3", "llama3.2"]
+
+HEDGE_PATTERNS = re.compile(
+    r"\b(i don'?t know|i do not know|not (enough|sufficient) (information|context)|"
+    r"(is )?not (provided|mentioned|available) in the (context|documents)|"
+    r"cannot (be )?(determine|answer)|unable to (determine|answer)|no information)\b",
+    re.IGNORECASE,
+)
+COMPLEX_PATTERNS = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|difference|trend|why|explain|total|sum|average|"
+    r"rank|largest|biggest|smallest|growth|change|between)\b",
+    re.IGNORECASE,
+)
+THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+def strip_thinking(text: str) -> str:
+    """Drop the ``<think>...</think>`` block that qwen3 models emit."""
+    return THINK_BLOCK.sub("", text).strip()
+
+
+class ModelRouter:
+    def __init__(self, models: Optional[List[str]] = None, chat_fn: Callable = ollama.chat,
+                 max_distance: float = DENSE_DISTANCE, complexity_threshold: float = 0.5):
+        self.models = models or list(DEFAULT_MODELS)
+        self.chat_fn = chat_fn
+        self.max_distance = max_distance
+        self.complexity_threshold = complexity_threshold
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, Dict[str, float]] = {
+            m: {"calls": 0, "total_latency_s": 0.0, "escalations": 0} for m in self.models
+        }
+        self.routed = 0
+
+    @classmethod
+    def from_env(cls, var: str = "RAG_MODELS") -> Optional["ModelRouter"]:
+        """Build a router from a comma-separated model list, or None if unset."""
+        value = os.environ.get(var, "").strip()
+        if not value:
+            return None
+        return cls(models=[m.strip() for m in value.split(",") if m.strip()])
+
+    def complexity(self, question: str) -> float:
+        """Score in [0, 1]: long, multi-part or comparative questions score higher."""
+        words = len(question.split())
+        score = min(words / 40, 0.5)
+        score += 0.3 * min(len(COMPLEX_PATTERNS.findall(question)), 2) / 2
+        score += 0.2 * min(question.count("?") + question.lower().count(" and "), 2) / 2
+        return min(score, 1.0)
+
+    def retrieval_is_weak(self, distances: Optional[List[float]]) -> bool:
+        if distances is None:
+            return False
+        return not distances or min(distances) > self.max_distance
+
+    def answer_is_weak(self, answer: str) -> bool:
+        text = strip_thinking(answer)
+        return len(text) < 2 or bool(HEDGE_PATTERNS.search(text))
+
+    def _record(self, model: str, latency: float, escalated: bool):
+        with self._lock:
+            stats = self.metrics.setdefault(model, {"calls": 0, "total_latency_s": 0.0, "escalations": 0})
+            stats["calls"] += 1
+            stats["total_latency_s"] += latency
+            if escalated:
+                stats["escalations"] += 1
+
+    def answer(self, messages: List[dict], question: str,
+               distances: Optional[List[float]] = None) -> Tuple[str, str]:
+        """Run the cascade and return ``(answer, model_used)``."""
+        tier = 0
+        if len(self.models) > 1 and (
+            self.complexity(question) >= self.complexity_threshold or self.retrieval_is_weak(distances)
+        ):
+            tier = 1
+
+        with self._lock:
+            self.routed += 1
+
+        while True:
+            model = self.models[tier]
+            start = time.time()
+            response = self.chat_fn(model=model, messages=messages)
+            answer = response["message"]["content"]
+            last = tier == len(self.models) - 1
+            escalate = not last and self.answer_is_weak(answer)
+            self._record(model, time.time() - start, escalate)
+            if not escalate:
+                return answer, model
+            tier += 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-model call count, mean latency and escalation rate."""
+        with self._lock:
+            report = {}
+            for model, stats in self.metrics.items():
+                calls = stats["calls"]
+                report[model] = {
+                    "calls": calls,
+                    "mean_latency_s": round(stats["total_latency_s"] / calls, 4) if calls else 0.0,
+                    "escalation_rate": round(stats["escalations"] / calls, 4) if calls else 0.0,
+                }
+            report["_total"] = {"questions": self.routed}
+            return report
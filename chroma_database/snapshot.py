@@ -0,0 +1,365 @@
+"""
+Portable snapshots of embedded corpora.
+
+A snapshot holds ids, text, metadata and float32 vectors in a single Arrow IPC
+(``.arrow``) or Parquet (``.parquet``) file, together with the embedding model
+and format version in the schema metadata. Restoring a snapshot skips the
+embedding step entirely, so moving a knowledge base between machines no longer
+means re-running ``upload_csv`` or ``setup_lancedb()``.
+
+Imports refuse a snapshot whose vector dimension differs from the target, or
+whose embedding model differs from the target's (pass ``force=True`` /
+``--force`` to accept a different model name).
+
+Usage:
+    python -m chroma_database.snapshot export budget.arrow
+    python -m chroma_database.snapshot import budget.arrow --target lancedb
+"""
+import argparse
+import json
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SNAPSHOT_FORMAT_VERSION = "1"
+DEFAULT_EXPORT_BATCH = 5000
+
+
+def _schema(dim: int, meta: Dict[str, str]) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field("id", pa.string(), nullable=False),
+            pa.field("text", pa.string()),
+            pa.field("metadata", pa.string()),
+            pa.field("vector", pa.list_(pa.float32(), dim)),
+        ],
+        metadata={k: str(v) for k, v in meta.items()},
+    )
+
+
+def _to_batch(schema: pa.Schema, ids: List[str], texts: List[Optional[str]],
+              metadatas: List[Optional[dict]], vectors: np.ndarray) -> pa.RecordBatch:
+    dim = schema.field("vector").type.list_size
+    flat = pa.array(np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1))
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(ids, pa.string()),
+            pa.array(texts, pa.string()),
+            pa.array([json.dumps(m, ensure_ascii=False) if m else None for m in metadatas], pa.string()),
+            pa.FixedSizeListArray.from_arrays(flat, dim),
+        ],
+        schema=schema,
+    )
+
+
+def _open_writer(path: str, schema: pa.Schema):
+    if path.endswith(".parquet"):
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    return pa.ipc.new_file(path, schema)
+
+
+def _iter_collection(collection, batch_size: int) -> Iterator[Tuple[list, list, list, np.ndarray]]:
+    offset = 0
+    while True:
+        page = collection.get(
+            limit=batch_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if not page["ids"]:
+            return
+        yield (
+            page["ids"],
+            page["documents"] or [None] * len(page["ids"]),
+            page["metadatas"] or [None] * len(page["ids"]),
+            np.asarray(page["embeddings"], dtype=np.float32),
+        )
+        offset += len(page["ids"])
+
+
+def _write_pages(path: str, pages: Iterator[Tuple[list, list, list, np.ndarray]],
+                 meta: Dict[str, str]) -> int:
+    writer, schema, written = None, None, 0
+    try:
+        for ids, texts, metadatas, vectors in pages:
+            if writer is None:
+                meta["dimension"] = str(vectors.shape[1])
+                schema = _schema(vectors.shape[1], meta)
+                writer = _open_writer(path, schema)
+            writer.write_batch(_to_batch(schema, ids, texts, metadatas, vectors))
+            written += len(ids)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("Nothing to export: the source is empty")
+    return written
+
+
+def export_collection(collection, path: str, model_name: Optional[str] = None,
+                      batch_size: int = DEFAULT_EXPORT_BATCH) -> int:
+    """Write every record of a Chroma collection to ``path``. Returns the row count."""
+    start = time.time()
+    meta = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "source": "chroma",
+        "collection": collection.name,
+        "model": model_name or "unknown",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    written = _write_pages(path, _iter_collection(collection, batch_size), meta)
+    print(f"Exported {written} records to {path} in {time.time() - start:.2f}s")
+    return written
+
+
+def export_lancedb(db_path: str, table_name: str, path: str,
+                   model_name: Optional[str] = None) -> int:
+    """Write a LanceDB table (``id``/``text``/``vector`` columns) to ``path``."""
+    import lancedb
+
+    start = time.time()
+    table = lancedb.connect(db_path).open_table(table_name)
+
+    def pages():
+        for batch in table.to_lance().to_batches(columns=["id", "text", "vector"]):
+            if batch.num_rows == 0:
+                continue
+            vectors = batch.column("vector")
+            dim = vectors.type.list_size
+            yield (
+                batch.column("id").to_pylist(),
+                batch.column("text").to_pylist(),
+                [None] * batch.num_rows,
+                vectors.flatten().to_numpy(zero_copy_only=False).reshape(-1, dim),
+            )
+
+    meta = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "source": "lancedb",
+        "collection": table_name,
+        "model": model_name or _lancedb_model(table.schema) or "unknown",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    written = _write_pages(path, pages(), meta)
+    print(f"Exported {written} records to {path} in {time.time() - start:.2f}s")
+    return written
+
+
+def read_snapshot_info(path: str) -> Dict[str, str]:
+    """Return the schema metadata (model, dimension, version...) of a snapshot."""
+    schema = pq.read_schema(path) if path.endswith(".parquet") else pa.ipc.open_file(pa.memory_map(path)).schema
+    return {k.decode(): v.decode() for k, v in (schema.metadata or {}).items()}
+
+
+def iter_snapshot(path: str, batch_size: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Stream record batches from a snapshot.
+
+    Arrow IPC files are memory-mapped, so batches reference the file pages
+    directly instead of being copied onto the heap.
+    """
+    if path.endswith(".parquet"):
+        pf = pq.ParquetFile(path, memory_map=True)
+        yield from pf.iter_batches(batch_size=batch_size or 65536)
+        return
+
+    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if batch_size is None:
+            yield batch
+        else:
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size)
+
+
+def batch_vectors(batch: pa.RecordBatch) -> np.ndarray:
+    """Zero-copy ``(rows, dim)`` float32 view of a batch's vector column."""
+    vectors = batch.column("vector")
+    dim = vectors.type.list_size
+    return vectors.flatten().to_numpy(zero_copy_only=True).reshape(-1, dim)
+
+
+def _check_model(info: Dict[str, str], model_name: Optional[str], force: bool = False):
+    snap_model = info.get("model", "unknown")
+    if not model_name or model_name == snap_model:
+        return
+    if snap_model == "unknown":
+        print(f"Warning: snapshot does not record its embedding model; assuming '{model_name}'")
+    elif not force:
+        raise ValueError(
+            f"Snapshot was embedded with '{snap_model}', target expects '{model_name}' (use force=True to import anyway)"
+        )
+
+
+def _check_dimension(info: Dict[str, str], dim: Optional[int]):
+    snap_dim = info.get("dimension")
+    if dim and snap_dim and int(snap_dim) != dim:
+        raise ValueError(f"Snapshot vectors have dimension {snap_dim}, target expects {dim}")
+
+
+def _collection_dimension(collection) -> Optional[int]:
+    page = collection.get(limit=1, include=["embeddings"])
+    embeddings = page.get("embeddings")
+    return len(embeddings[0]) if embeddings is not None and len(embeddings) else None
+
+
+def _lancedb_model(schema: pa.Schema) -> Optional[str]:
+    """Model name from a LanceDB table's embedding function config, if it has one."""
+    raw = (schema.metadata or {}).get(b"embedding_functions")
+    if not raw:
+        return None
+    try:
+        for function in json.loads(raw):
+            model = function.get("model") or {}
+            name = model.get("name") or model.get("model_name") or model.get("model") or function.get("name")
+            if name:
+                return str(name)
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+def import_to_collection(collection, path: str, batch_size: int = 5000,
+                         model_name: Optional[str] = None, force: bool = False) -> int:
+    """Upsert a snapshot into a Chroma collection without re-embedding."""
+    info = read_snapshot_info(path)
+    _check_dimension(info, _collection_dimension(collection))
+    _check_model(info, model_name, force)
+
+    start = time.time()
+    imported = 0
+    for batch in iter_snapshot(path, batch_size):
+        ids = batch.column("id").to_pylist()
+        texts = batch.column("text").to_pylist()
+        metadatas = [json.loads(m) if m else None for m in batch.column("metadata").to_pylist()]
+        vectors = batch_vectors(batch)
+
+        # Chroma rejects empty metadata entries, so rows with and without
+        # metadata are sent as separate calls.
+        with_meta = [i for i, m in enumerate(metadatas) if m]
+        without_meta = [i for i, m in enumerate(metadatas) if not m]
+        for idx, has_meta in ((with_meta, True), (without_meta, False)):
+            if not idx:
+                continue
+            collection.upsert(
+                ids=[ids[i] for i in idx],
+                embeddings=vectors[idx],
+                documents=[texts[i] for i in idx],
+                metadatas=[metadatas[i] for i in idx] if has_meta else None,
+            )
+        imported += len(ids)
+
+    print(f"Imported {imported} records from {path} in {time.time() - start:.2f}s")
+    return imported
+
+
+def import_to_lancedb(path: str, db_path: str = "./db", table_name: str = "knowledge",
+                      mode: str = "overwrite", schema=None, model_name: Optional[str] = None,
+                      force: bool = False) -> int:
+    """
+    Load a snapshot into a LanceDB table.
+
+    ``mode`` is ``"overwrite"``, ``"create"`` or ``"append"``. The table keeps
+    its own schema, including the embedding function config that string
+    searches need: an existing table's schema is reused, otherwise pass the
+    ``LanceModel`` (e.g. ``lancedb_setup.Document``) as ``schema``. Snapshot
+    columns the table does not have (such as ``metadata``) are dropped. An
+    overwritten table needs its FTS index rebuilt.
+    """
+    import lancedb
+
+    db = lancedb.connect(db_path)
+    start = time.time()
+    info = read_snapshot_info(path)
+
+    exists = table_name in db.table_names()
+    if mode == "append" and not exists:
+        raise ValueError(f"Table '{table_name}' does not exist in {db_path}; use mode='create'")
+    if schema is None and exists:
+        schema = db.open_table(table_name).schema
+    if schema is None:
+        print(f"Warning: no schema for '{table_name}'; the table gets no embedding function, "
+              "so it can only be searched with vectors")
+        schema = _snapshot_schema(path)
+        schema = schema.remove(schema.get_field_index("metadata"))
+    target = schema.to_arrow_schema() if hasattr(schema, "to_arrow_schema") else schema
+
+    _check_dimension(info, target.field("vector").type.list_size if "vector" in target.names else None)
+    _check_model(info, model_name or _lancedb_model(target), force)
+
+    table = db.open_table(table_name) if mode == "append" else db.create_table(table_name, schema=schema, mode=mode)
+    columns = [name for name in target.names if name in _snapshot_schema(path).names]
+    columns_schema = pa.schema([target.field(name) for name in columns])
+    imported = 0
+    for batch in iter_snapshot(path):
+        table.add(pa.Table.from_batches([batch]).select(columns).cast(columns_schema))
+        imported += batch.num_rows
+
+    print(f"Imported {imported} records into {db_path}/{table_name} in {time.time() - start:.2f}s")
+    return imported
+
+
+def _snapshot_schema(path: str) -> pa.Schema:
+    if path.endswith(".parquet"):
+        return pq.read_schema(path).remove_metadata()
+    return pa.ipc.open_file(pa.memory_map(path)).schema.remove_metadata()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import embedded corpus snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Write a collection/table to .arrow or .parquet")
+    exp.add_argument("path")
+    exp.add_argument("--source", choices=["chroma", "lancedb"], default="chroma")
+    exp.add_argument("--persist-dir", default="./chroma_database")
+    exp.add_argument("--collection", default="RAGTutorial")
+    exp.add_argument("--db-path", default="./db")
+    exp.add_argument("--table", default="knowledge")
+    exp.add_argument("--model", default=None)
+
+    imp = sub.add_parser("import", help="Restore a snapshot without re-embedding")
+    imp.add_argument("path")
+    imp.add_argument("--target", choices=["chroma", "lancedb"], default="chroma")
+    imp.add_argument("--persist-dir", default="./chroma_database")
+    imp.add_argument("--collection", default="RAGTutorial")
+    imp.add_argument("--db-path", default="./db")
+    imp.add_argument("--table", default="knowledge")
+    imp.add_argument("--mode", choices=["overwrite", "create", "append"], default="overwrite")
+    imp.add_argument("--batch-size", type=int, default=5000)
+    imp.add_argument("--model", default=None, help="Target embedding model (default: the target's own)")
+    imp.add_argument("--force", action="store_true", help="Import even if the embedding model differs")
+
+    info = sub.add_parser("info", help="Show snapshot metadata")
+    info.add_argument("path")
+
+    args = parser.parse_args()
+
+    if args.command == "info":
+        for k, v in read_snapshot_info(args.path).items():
+            print(f"{k}: {v}")
+        return
+
+    if args.command == "export" and args.source == "lancedb":
+        export_lancedb(args.db_path, args.table, args.path, model_name=args.model)
+        return
+    if args.command == "import" and args.target == "lancedb":
+        import_to_lancedb(args.path, args.db_path, args.table, mode=args.mode,
+                          model_name=args.model, force=args.force)
+        return
+
+    from .manager import ChromaManager
+
+    db = ChromaManager(persist_dir=args.persist_dir, collection_name=args.collection)
+    if args.command == "export":
+        db.export_snapshot(args.path, model_name=args.model)
+    else:
+        db.import_snapshot(args.path, batch_size=args.batch_size, model_name=args.model, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
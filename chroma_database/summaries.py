@@ -0,0 +1,190 @@
+"""
+Hierarchical summary index for broad questions over long PDFs.
+
+At ingest time a background worker pool summarizes each section of a PDF
+(top-level outline entries, or fixed page windows when there is no outline)
+and then the whole document from its section summaries. Summary nodes live in
+a separate ``<collection>_summaries`` collection and link to their pages:
+
+    document summary  ->  section summaries  ->  raw pages (main collection)
+
+``ChromaManager.query_hierarchical`` searches the summary tier first and only
+drills down into the linked pages when the summaries are not a close match
+or the question asks for specifics (figures, years, quoted terms). The drill
+down is restricted to the pages of the matched sections through the
+``source``/``page`` metadata that ``upload_pdf`` stores on every page.
+
+Document builds run on their own single worker and submit section summaries
+to a separate pool, so concurrent uploads cannot starve each other.
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import ollama
+
+SECTION_PROMPT = (
+    "Summarize this section of a budget document in at most 150 words. "
+    "Keep program names, amounts, years and changes."
+)
+DOCUMENT_PROMPT = (
+    "Write an overview of the whole document in at most 200 words from these section summaries. "
+    "Keep the main figures and conclusions."
+)
+SPECIFIC_QUESTION = re.compile(
+    r"\d|\"[^\"]+\"|(?<!\w)'[^']+'(?!\w)|\b(exact|exactly|how much|how many|which page|quote)\b",
+    re.IGNORECASE,
+)
+
+
+def pdf_sections(reader, window: int = 10) -> List[Tuple[str, int, int]]:
+    """Return ``(title, first_page, last_page_exclusive)`` from the outline or fixed windows."""
+    total = len(reader.pages)
+    starts = []
+    try:
+        for entry in reader.outline:
+            if isinstance(entry, list):
+                continue
+            starts.append((str(entry.title), reader.get_destination_page_number(entry)))
+    except Exception:
+        starts = []
+
+    starts = sorted({page: title for title, page in starts if page is not None}.items())
+    if len(starts) < 2:
+        return [(f"Pages {s + 1}-{min(s + window, total)}", s, min(s + window, total))
+                for s in range(0, total, window)]
+
+    if starts[0][0] > 0:
+        starts.insert(0, (0, "Front matter"))
+    sections = []
+    for i, (page, title) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else total
+        if end > page:
+            sections.append((title, page, end))
+    return sections
+
+
+class SummaryIndex:
+    def __init__(self, manager, collection, max_workers: int = 2,
+                 chat_fn: Callable = ollama.chat, max_section_chars: int = 12000):
+        self.manager = manager
+        self.collection = collection
+        self.chat_fn = chat_fn
+        self.max_section_chars = max_section_chars
+        self._builds = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summaries-build")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summaries")
+        self._lock = threading.Lock()
+        self.pending: Dict[str, Future] = {}
+
+    def _summarize(self, instruction: str, text: str) -> str:
+        response = self.chat_fn(
+            model=self.manager.chat_model,
+            messages=[
+                {"role": "system", "content": instruction},
+                {"role": "user", "content": text[:self.max_section_chars]},
+            ],
+        )
+        content = response["message"]["content"]
+        return re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL).strip()
+
+    def build(self, file_path: str, pages: Dict[int, str], sections: List[Tuple[str, int, int]]) -> int:
+        """Summarize every section, then the document. Returns the number of nodes written."""
+        start = time.time()
+        source = os.path.basename(file_path)
+        section_futures = []
+        for k, (title, first, last) in enumerate(sections):
+            text = "\n\n".join(pages[i] for i in range(first, last) if pages.get(i, "").strip())
+            if text.strip():
+                section_futures.append((k, title, first, last,
+                                        self._executor.submit(self._summarize, SECTION_PROMPT, text)))
+
+        ids, documents, metadatas = [], [], []
+        for k, title, first, last, future in section_futures:
+            page_ids = [self.manager._create_doc_id(file_path, f"page_{i}")
+                        for i in range(first, last) if pages.get(i, "").strip()]
+            ids.append(self.manager._create_doc_id(file_path, f"section_{k}"))
+            documents.append(f"{title}\n{future.result()}")
+            metadatas.append({
+                "level": "section",
+                "source": source,
+                "title": title,
+                "first_page": first,
+                "last_page": last - 1,
+                "pages": json.dumps(page_ids),
+            })
+
+        if not ids:
+            return 0
+
+        overview = self._summarize(DOCUMENT_PROMPT, "\n\n".join(documents))
+        ids.append(self.manager._create_doc_id(file_path, "summary"))
+        documents.append(f"{source} overview\n{overview}")
+        metadatas.append({"level": "document", "source": source, "sections": json.dumps(ids[:-1])})
+
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        print(f"Built {len(ids)} summary nodes for {source} in {time.time() - start:.2f}s")
+        return len(ids)
+
+    def submit(self, file_path: str, pages: Dict[int, str], sections: List[Tuple[str, int, int]]) -> Future:
+        """Build the summaries in the background; ``pending`` tracks unfinished documents."""
+        with self._lock:
+            future = self._builds.submit(self.build, file_path, pages, sections)
+            self.pending[os.path.basename(file_path)] = future
+
+        def _done(f: Future):
+            with self._lock:
+                self.pending.pop(os.path.basename(file_path), None)
+            if f.exception():
+                print(f"Summary build for {file_path} failed: {f.exception()}")
+
+        future.add_done_callback(_done)
+        return future
+
+    def retrieve(self, question: str, n_summaries: int = 3, drill_down_pages: int = 3,
+                 max_distance: float = 1.0) -> Tuple[List[str], List[float], bool]:
+        """
+        Return ``(documents, distances, drilled_down)``.
+
+        Summary nodes are used alone when the best one is within
+        ``max_distance`` and the question is broad. Otherwise the pages linked
+        to the matching sections are searched as well.
+        """
+        if self.collection.count() == 0:
+            return [], [], False
+        results = self.collection.query(query_texts=[question], n_results=n_summaries)
+        documents, distances = results["documents"][0], results["distances"][0]
+        metadatas = results["metadatas"][0]
+
+        broad = not SPECIFIC_QUESTION.search(question)
+        if distances and distances[0] <= max_distance and broad:
+            return documents, distances, False
+
+        sections = []
+        for metadata in metadatas:
+            if metadata and metadata.get("level") == "section":
+                sections.append(metadata)
+            elif metadata and metadata.get("level") == "document":
+                sections.extend(self.collection.get(ids=json.loads(metadata["sections"]))["metadatas"])
+        if not sections:
+            return documents, distances, False
+
+        clauses = [{"$and": [{"source": m["source"]}, {"page": {"$gte": m["first_page"]}},
+                             {"page": {"$lte": m["last_page"]}}]} for m in sections]
+        where = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        try:
+            pages = self.manager.collection.query(query_texts=[question], n_results=drill_down_pages, where=where)
+            picked = list(zip(pages["documents"][0], pages["distances"][0]))
+        except NotImplementedError:
+            picked = []
+
+        if not picked:
+            # Pages stored without source/page metadata: take the linked pages in order,
+            # scored with the distance of the best matching summary.
+            page_ids = [page_id for m in sections for page_id in json.loads(m["pages"])][:drill_down_pages]
+            linked = self.manager.collection.get(ids=page_ids)["documents"] if page_ids else []
+            picked = [(doc, distances[0]) for doc in linked]
+        return documents + [d for d, _ in picked], distances + [d for _, d in picked], True
@@ -0,0 +1,213 @@
+"""
+Pluggable web search providers for ``ChromaManager.search_web``.
+
+``CachedSearchProvider`` wraps any provider with:
+- a persistent SQLite TTL cache keyed by the normalized query
+- coalescing of identical in-flight queries into a single request
+- a token-bucket rate limiter
+- a hard timeout per request
+- stale-while-revalidate: expired entries are served immediately while a
+  background refresh fetches new results
+
+Example:
+    >>> provider = CachedSearchProvider(StubSearchProvider({"imf": ["snippet"]}), cache_path=":memory:")
+    >>> provider.search("IMF", num_results=3)
+    ['snippet']
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+
+class SearchTimeout(Exception):
+    """Raised when a provider does not answer within the configured timeout."""
+
+
+class SearchProvider:
+    """Base class: return up to ``num_results`` text snippets for ``query``."""
+
+    name = "base"
+
+    def search(self, query: str, num_results: int = 5) -> List[str]:
+        raise NotImplementedError
+
+
+class DuckDuckGoProvider(SearchProvider):
+    name = "duckduckgo"
+
+    def __init__(self, region: str = "wt-wt", safesearch: str = "moderate", timeout: int = 10):
+        self.region = region
+        self.safesearch = safesearch
+        self.timeout = timeout
+
+    def search(self, query: str, num_results: int = 5) -> List[str]:
+        from duckduckgo_search import DDGS
+
+        with DDGS(timeout=self.timeout) as ddgs:
+            results = ddgs.text(query, region=self.region, safesearch=self.safesearch, max_results=num_results)
+            return [r["body"] for r in results or []]
+
+
+class StubSearchProvider(SearchProvider):
+    """Offline provider for tests and benchmarks. Counts calls and can simulate latency."""
+
+    name = "stub"
+
+    def __init__(self, responses: Optional[Dict[str, List[str]]] = None, delay: float = 0.0):
+        self.responses = {normalize_query(k): v for k, v in (responses or {}).items()}
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, num_results: int = 5) -> List[str]:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        default = [f"stub result {i + 1} for {query}" for i in range(num_results)]
+        return self.responses.get(normalize_query(query), default)[:num_results]
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SearchCache:
+    """Persistent query -> results store backed by SQLite."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, results TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[List[str], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, fetched_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, results: List[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, results, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(results, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM search_cache WHERE fetched_at < ?", (time.time() - older_than,))
+            self._conn.commit()
+            return cur.rowcount
+
+
+class CachedSearchProvider(SearchProvider):
+    """
+    Cache, coalesce, rate-limit and time-bound calls to ``provider``.
+
+    Entries younger than ``ttl`` seconds are fresh. Entries between ``ttl`` and
+    ``ttl + stale_ttl`` are returned as-is and refreshed in the background.
+    Older entries are refetched in the foreground.
+    """
+
+    def __init__(self, provider: SearchProvider, cache_path: str = ":memory:", ttl: float = 3600,
+                 stale_ttl: float = 86400, rate: float = 1.0, burst: int = 3,
+                 timeout: float = 8.0, max_workers: int = 4):
+        self.provider = provider
+        self.name = f"cached-{provider.name}"
+        self.cache = SearchCache(cache_path)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate, burst)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale": 0, "misses": 0, "coalesced": 0}
+
+    def _key(self, query: str, num_results: int) -> str:
+        return f"{self.provider.name}:{num_results}:{normalize_query(query)}"
+
+    def _fetch(self, key: str, query: str, num_results: int) -> List[str]:
+        if not self.limiter.acquire(timeout=self.timeout):
+            raise SearchTimeout(f"Rate limit wait exceeded {self.timeout}s for '{query}'")
+        results = self.provider.search(query, num_results)
+        self.cache.put(key, results)
+        return results
+
+    def _submit(self, key: str, query: str, num_results: int) -> Future:
+        """Start a fetch for ``key`` or join the one already running."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            future = self._executor.submit(self._fetch, key, query, num_results)
+            self._inflight[key] = future
+
+        def _done(_):
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.add_done_callback(_done)
+        return future
+
+    def search(self, query: str, num_results: int = 5) -> List[str]:
+        key = self._key(query, num_results)
+        cached = self.cache.get(key)
+
+        if cached is not None:
+            results, fetched_at = cached
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return results
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale"] += 1
+                self._submit(key, query, num_results)
+                return results
+
+        self.stats["misses"] += 1
+        future = self._submit(key, query, num_results)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise SearchTimeout(f"Web search for '{query}' exceeded {self.timeout}s")
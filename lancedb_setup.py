@@ -81,6 +81,25 @@ def retrieve_similar_docs(table: LanceTable, query: str, query_type: str = 'hybr
     )
     return results
 
+def add_collapsed_csv_to_table(table: LanceTable, csv_path: str, max_hamming: int = 0):
+    """
+    Group near-duplicate CSV rows and add one document per group to the LanceDB table.
+    """
+    from chroma_database.dedup import collapse_rows, group_summary, read_csv_rows
+
+    header, rows, indices = read_csv_rows(csv_path)
+    groups = collapse_rows(header, rows, indices, max_hamming=max_hamming)
+
+    docs = [
+        {'id': f'{Path(csv_path).stem}_group_{g["rows"][0]}', 'text': f'{g["text"]}\n{group_summary(g)}'}
+        for g in groups
+    ]
+    if docs:
+        table.add(docs)
+        print(f'Added {len(docs)} documents for {len(rows)} CSV rows.')
+    else:
+        print('No rows found or added from CSV.')
+
 def add_csv_to_table(table: LanceTable, csv_path: str, max_tokens: int = 8192):
     """
     Load a CSV file, convert each row to a plain-text document, and add to LanceDB table.
@@ -121,6 +140,7 @@ def setup_lancedb():
 
     add_documents_to_table(table, knowledge_base_dir)
     add_csv_to_table(table, csv_path)  # this is called inside setup_lancedb()
+    return table
 
 
 if __name__ == '__main__':
@@ -7,6 +7,7 @@ import chromadb
 from chromadb.config import Settings
 import ollama
 import pypdf
+from chroma_database.adaptive import NO_CONTEXT_ANSWER, adaptive_retrieve
 
 # Constants
 PERSIST_DIR = "./chroma_database"
@@ -110,9 +111,9 @@ def upload_pdf(file_path):
 def ask_question(query):
     try:
         client, collection = create_client_and_collection()
-        results = collection.query(query_texts=[query], n_results=10)
-
-        context_docs = results["documents"][0]
+        context_docs, _ = adaptive_retrieve(collection, query, k=10)
+        if not context_docs:
+            return NO_CONTEXT_ANSWER
         print("🔍 Retrieved documents from ChromaDB:")
         for i, doc in enumerate(context_docs):
             print(f"Document {i+1}: {doc[:300]}...")
@@ -122,9 +123,12 @@ def ask_question(query):
             "Use this information to answer the user's question accurately and completely."
         )
 
-        messages = [{"role": "system", "content": context_intro}]
-        messages += [{"role": "system", "content": doc} for doc in context_docs]
-        messages.append({"role": "user", "content": query})
+        # Instructions first and the documents in one message, so the prompt
+        # starts with the same tokens on every call.
+        messages = [
+            {"role": "system", "content": context_intro},
+            {"role": "user", "content": "Documents:\n\n" + "\n\n".join(context_docs) + f"\n\nQuestion: {query}"},
+        ]
 
         response = ollama.chat(model="myqwen3", messages=messages)
         return response["message"]["content"]
@@ -11,13 +11,18 @@ def main():
     total, uploaded = db.upload_pdf("./pearl-primer.pdf")
     print(f"PDF: {total} pages total, uploaded {uploaded} new pages")
     
-    print("\nAsk questions (type 'exit' to quit):")
+    # Follow-up questions share one session so the prompt prefix is reused
+    session = db.start_chat()
+    print("\nAsk questions (type 'exit' to quit, 'reset' for a new conversation):")
     while True:
         query = input("\nQuestion: ").strip()
         if query.lower() == 'exit':
             break
+        if query.lower() == 'reset':
+            session.reset()
+            continue
             
-        answer, sources = db.query(query)
+        answer, sources = session.ask(query)
         print(f"\nAnswer: {answer}\n")
         print("Sources:")
         for i, source in enumerate(sources, 1):
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 import pandas as pd
 from langchain_community.embeddings import OllamaEmbeddings
@@ -26,7 +27,13 @@ class LocalEmbeddingFunction:
             return np.array([self.embeddings.embed_query(texts)])
         return np.array(self.embeddings.embed_documents(texts))
 
-embedding_func = LocalEmbeddingFunction()
+# Set LOCAL_EMBEDDER_DIR to a folder with model.onnx + tokenizer.json to embed
+# in-process instead of going through the Ollama HTTP API.
+if os.environ.get("LOCAL_EMBEDDER_DIR"):
+    from chroma_database.onnx_embedder import OnnxEmbedder
+    embedding_func = OnnxEmbedder(os.environ["LOCAL_EMBEDDER_DIR"])
+else:
+    embedding_func = LocalEmbeddingFunction()
 
 
 # ─── (2) LanceDB schema ───────────────────────────────────────────────────────
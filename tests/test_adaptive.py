@@ -0,0 +1,60 @@
+from chroma_database.adaptive import adaptive_retrieve, select_documents
+
+
+class FakeCollection:
+    def __init__(self, distances):
+        self.distances = distances
+        self.requested = []
+
+    def query(self, query_texts, n_results):
+        self.requested.append(n_results)
+        distances = self.distances[:n_results]
+        return {"ids": [[f"id {i}" for i in range(len(distances))]],
+                "documents": [[f"doc {i}" for i in range(len(distances))]], "distances": [distances]}
+
+
+def test_select_documents_cuts_at_threshold_and_gap():
+    docs, dists, cut = select_documents(["a", "b", "c", "d"], [0.2, 0.3, 0.7, 0.8], max_distance=1.0, max_gap=0.15)
+    assert docs == ["a", "b"] and dists == [0.2, 0.3] and cut
+    docs, _, cut = select_documents(["a", "b"], [0.5, 1.2], max_distance=1.0, max_gap=None)
+    assert docs == ["a"] and cut
+    docs, _, cut = select_documents(["a", "b"], [0.5, 0.6], max_distance=None, max_gap=None)
+    assert docs == ["a", "b"] and not cut
+
+
+def test_ordinary_distances_do_not_grow_k():
+    collection = FakeCollection([0.8 + 0.01 * i for i in range(50)])
+    docs, _ = adaptive_retrieve(collection, "q", k=5)
+    assert collection.requested == [5]
+    assert len(docs) == 5
+
+
+def test_main3_style_k10_stays_bounded():
+    collection = FakeCollection([0.8 + 0.01 * i for i in range(50)])
+    docs, _ = adaptive_retrieve(collection, "q", k=10)
+    assert collection.requested == [10]
+    assert len(docs) == 10
+
+
+def test_dense_results_double_k_once_by_default():
+    collection = FakeCollection([0.2 + 0.005 * i for i in range(50)])
+    docs, _ = adaptive_retrieve(collection, "q", k=5)
+    assert collection.requested == [5, 10]
+    assert len(docs) == 10
+
+
+def test_nothing_relevant_returns_empty():
+    collection = FakeCollection([1.4, 1.5, 1.6])
+    assert adaptive_retrieve(collection, "q", k=5) == ([], [])
+
+
+def test_small_collection_is_not_requeried():
+    collection = FakeCollection([0.1, 0.2])
+    docs, _ = adaptive_retrieve(collection, "q", k=5)
+    assert collection.requested == [5]
+    assert len(docs) == 2
+
+
+def test_with_ids_returns_matching_ids():
+    collection = FakeCollection([0.2, 0.3, 1.4])
+    assert adaptive_retrieve(collection, "q", k=3, with_ids=True) == (["id 0", "id 1"], ["doc 0", "doc 1"], [0.2, 0.3])
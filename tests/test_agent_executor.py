@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+
+import pytest
+
+from agent_executor import AgentExecutor, ScriptedLLM
+
+
+def plan(*steps):
+    return json.dumps({"steps": list(steps)})
+
+
+def step(step_id, tool, query, depends_on=()):
+    return {"id": step_id, "tool": tool, "args": {"query": query}, "depends_on": list(depends_on)}
+
+
+def test_scripted_llm_replays_responses_and_records_prompts():
+    llm = ScriptedLLM(["one", "two"])
+    assert [llm("a"), llm("b"), llm("c")] == ["one", "two", ""]
+    assert llm.prompts == ["a", "b", "c"]
+
+
+def test_invalid_plan_falls_back_to_default_search_steps():
+    agent = AgentExecutor(ScriptedLLM(["<think>hm</think> not json"]),
+                          {"vector_search": str, "keyword_search": str, "web_search": str})
+    steps = agent.plan("education budget")
+    assert [s["tool"] for s in steps] == ["vector_search", "keyword_search"]
+
+
+def test_plan_drops_unknown_tools_and_caps_steps():
+    raw = plan(step("s1", "vector_search", "a"), step("s2", "nope", "b"),
+               step("s3", "vector_search", "c"), step("s4", "vector_search", "d"))
+    agent = AgentExecutor(ScriptedLLM([raw]), {"vector_search": str}, max_steps=2)
+    assert [s["id"] for s in agent.plan("q")] == ["s1", "s3"]
+
+
+def test_independent_steps_run_in_parallel():
+    def slow(query):
+        time.sleep(0.2)
+        return query
+
+    raw = plan(step("s1", "a", "x"), step("s2", "b", "y"), step("s3", "c", "z"))
+    agent = AgentExecutor(ScriptedLLM([raw, "answer"]), {"a": slow, "b": slow, "c": slow})
+    start = time.time()
+    result = agent.run("q")
+    assert time.time() - start < 0.5
+    assert result["answer"] == "answer"
+    assert {k: r["output"] for k, r in result["results"].items()} == {"s1": "x", "s2": "y", "s3": "z"}
+
+
+def test_dependencies_render_earlier_results_and_failures_skip_dependents():
+    def boom(query):
+        raise RuntimeError("down")
+
+    raw = plan(step("s1", "echo", "budget"), step("s2", "echo", "about {s1}", ["s1"]),
+               step("s3", "boom", "x"), step("s4", "echo", "{s3}", ["s3"]))
+    agent = AgentExecutor(ScriptedLLM([raw, ""]), {"echo": lambda query: query.upper(), "boom": boom})
+    results = agent.run("q")["results"]
+    assert results["s2"]["output"] == "ABOUT BUDGET"
+    assert results["s3"]["error"] == "down"
+    assert results["s4"]["error"] == "skipped: dependency failed"
+
+
+def test_slow_tool_times_out_without_blocking_the_plan():
+    release = threading.Event()
+
+    def hang(query):
+        release.wait(5)
+        return query
+
+    raw = plan(step("s1", "hang", "x"), step("s2", "fast", "y"))
+    agent = AgentExecutor(ScriptedLLM([raw, ""]), {"hang": hang, "fast": lambda query: query}, tool_timeout=0.1)
+    start = time.time()
+    results = agent.run("q")["results"]
+    release.set()
+    assert time.time() - start < 1
+    assert results["s1"]["error"].startswith("timeout")
+    assert results["s2"]["output"] == "y"
+
+
+def test_identical_concurrent_steps_share_one_call():
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        time.sleep(0.2)
+        return query
+
+    raw = plan(step("s1", "search", "same"), step("s2", "search", "same"), step("s3", "search", "other"))
+    agent = AgentExecutor(ScriptedLLM([raw, ""]), {"search": search})
+    results = agent.run("q")["results"]
+    assert sorted(calls) == ["other", "same"]
+    assert results["s1"]["output"] == results["s2"]["output"] == "same"
+    assert sorted(r["cached"] for r in results.values()) == [False, False, True]
+
+
+def test_memo_reuses_results_across_runs_until_reset():
+    calls = []
+    raw = plan(step("s1", "search", "x"))
+    agent = AgentExecutor(ScriptedLLM([raw, "", raw, "", raw, ""]),
+                          {"search": lambda query: calls.append(query) or query})
+    agent.run("q")
+    assert agent.run("q")["results"]["s1"]["cached"]
+    agent.reset()
+    agent.run("q")
+    assert calls == ["x", "x"]
+
+
+def test_build_tools_searches_a_lancedb_table(tmp_path):
+    lancedb = pytest.importorskip("lancedb")
+    pytest.importorskip("lance")
+    from lancedb.embeddings import TextEmbeddingFunction, get_registry, register
+    from lancedb.pydantic import LanceModel, Vector
+
+    from agent_executor import build_tools
+
+    @register("agent-test-words")
+    class WordEmbeddings(TextEmbeddingFunction):
+        vocabulary: list = ["education", "health", "budget", "roads"]
+
+        def ndims(self):
+            return len(self.vocabulary)
+
+        def generate_embeddings(self, texts):
+            return [[float(word in text.lower()) + 0.01 for word in self.vocabulary] for text in texts]
+
+    embedder = get_registry().get("agent-test-words").create()
+
+    class Doc(LanceModel):
+        id: str
+        text: str = embedder.SourceField()
+        vector: Vector(embedder.ndims()) = embedder.VectorField()
+
+    table = lancedb.connect(str(tmp_path)).create_table("knowledge", schema=Doc)
+    table.add([{"id": "1", "text": "education budget"}, {"id": "2", "text": "health spending"},
+               {"id": "3", "text": "roads"}])
+    table.create_fts_index("text")
+
+    class Rag:
+        db = table
+
+    tools, descriptions = build_tools(Rag(), csv_path=None)
+    assert set(tools) == set(descriptions) == {"vector_search", "keyword_search"}
+    assert tools["vector_search"]("education", limit=1) == ["education budget"]
+    assert tools["keyword_search"]("health", limit=1) == ["health spending"]
@@ -0,0 +1,68 @@
+import json
+import random
+import time
+
+from chroma_database.adaptive import NO_CONTEXT_ANSWER
+from chroma_database.batch import answer_questions, load_questions
+
+
+class FakeCollection:
+    def __init__(self, latency=0.0):
+        self.calls = 0
+        self.latency = latency
+
+    def query(self, query_texts, n_results):
+        self.calls += 1
+        time.sleep(self.latency)
+        distances = [[0.3] if not q.startswith("unknown") else [1.8] for q in query_texts]
+        return {"documents": [[f"context for {q}"] for q in query_texts], "distances": distances}
+
+
+class FakeManager:
+    relevance_threshold = 1.0
+    score_gap = 0.15
+
+    def __init__(self):
+        self.collection = FakeCollection()
+
+    def generate(self, question, documents, distances):
+        time.sleep(random.random() * 0.02)
+        return question.upper()
+
+
+def test_load_questions_txt_and_jsonl(tmp_path):
+    txt = tmp_path / "q.txt"
+    txt.write_text("one\n\ntwo\n", encoding="utf-8")
+    jsonl = tmp_path / "q.jsonl"
+    jsonl.write_text('{"question": "three"}\n', encoding="utf-8")
+    assert load_questions(str(txt)) == ["one", "two"]
+    assert load_questions(str(jsonl)) == ["three"]
+
+
+def test_every_question_is_answered_once():
+    questions = [f"q{i}" for i in range(20)] + ["unknown topic"]
+    results = list(answer_questions(FakeManager(), questions, retrieval_batch=4))
+    assert sorted(r["index"] for r in results) == list(range(len(questions)))
+    by_index = {r["index"]: r for r in results}
+    assert by_index[0]["answer"] == "Q0"
+    assert by_index[20]["answer"] == NO_CONTEXT_ANSWER
+    assert by_index[20]["sources"] == []
+
+
+def test_answers_start_before_all_chunks_are_retrieved():
+    manager = FakeManager()
+    manager.collection = FakeCollection(latency=0.05)
+    results = answer_questions(manager, [f"q{i}" for i in range(40)], retrieval_batch=4)
+    next(results)
+    assert manager.collection.calls < 10
+    list(results)
+
+
+def test_output_file_is_overwritten_unless_appending(tmp_path):
+    out = tmp_path / "answers.jsonl"
+    for _ in range(2):
+        list(answer_questions(FakeManager(), ["a", "b"], output_path=str(out)))
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 2
+    list(answer_questions(FakeManager(), ["c"], output_path=str(out), append=True))
+    lines = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert sorted(line["question"] for line in lines) == ["a", "b", "c"]
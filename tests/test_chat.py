@@ -0,0 +1,104 @@
+from chroma_database.adaptive import NO_CONTEXT_ANSWER
+from chroma_database.chat import ChatSession, PrefixCacheStub
+
+
+class FakeCollection:
+    def __init__(self, results, distance=0.3):
+        self.results = results
+        self.distance = distance
+
+    def query(self, query_texts, n_results):
+        ids, documents = zip(*self.results[:n_results])
+        return {"ids": [list(ids)], "documents": [list(documents)], "distances": [[self.distance] * len(ids)]}
+
+
+class FakeManager:
+    chat_model = "test-model"
+    router = None
+
+    def __init__(self, results, distance=0.3):
+        self.collection = FakeCollection(results, distance)
+
+
+def test_prefix_cache_stub_counts_shared_prefix():
+    stub = PrefixCacheStub()
+    first = [{"role": "system", "content": "be brief"}, {"role": "user", "content": "one"}]
+    assert stub("m", first)["prompt_eval_count"] == 5
+    second = first + [{"role": "assistant", "content": "ok"}, {"role": "user", "content": "two"}]
+    assert stub("m", second)["prompt_eval_count"] == 2
+    assert stub.prefix_hit_tokens == 7
+    assert stub.prompt_tokens == 14
+
+
+def test_documents_are_sent_once_per_session():
+    session = ChatSession(FakeManager([("a", "doc A"), ("b", "doc B")]), chat_fn=PrefixCacheStub())
+    _, first = session.ask("first question")
+    _, second = session.ask("follow up")
+    assert first == ["doc A", "doc B"]
+    assert second == []
+    assert "doc A" not in session.turns[-1][0]["content"]
+
+
+def test_session_prompts_extend_the_previous_prompt():
+    stub = PrefixCacheStub()
+    session = ChatSession(FakeManager([("a", "doc A")]), chat_fn=stub)
+    for question in ("one", "two", "three"):
+        session.ask(question)
+    assert stub.prefix_hit_tokens > 0
+    assert session.stats["turns"] == 3
+
+
+def test_summarized_turns_release_their_documents():
+    manager = FakeManager([("a", "A" * 400), ("b", "B" * 400)])
+    session = ChatSession(manager, chat_fn=PrefixCacheStub(), max_context_tokens=200, keep_recent_turns=0)
+    session.ask("first question")
+    _, new_docs = session.ask("second question")
+    assert session.stats["summaries"] == 1
+    # The first turn's documents are only in the summary now, so they are sent again.
+    assert new_docs == ["A" * 400, "B" * 400]
+    assert session.turn_docs == [["a", "b"]]
+    assert session.seen_docs == {"a", "b"}
+
+
+def test_reset_forgets_turns_and_documents():
+    session = ChatSession(FakeManager([("a", "doc A")]), chat_fn=PrefixCacheStub())
+    session.ask("one")
+    session.reset()
+    assert session.turns == [] and session.turn_docs == [] and session.seen_docs == set()
+    assert session.ask("two")[1] == ["doc A"]
+
+
+def test_no_relevant_documents_skips_the_llm():
+    stub = PrefixCacheStub()
+    session = ChatSession(FakeManager([("a", "doc A")], distance=1.4), chat_fn=stub)
+    assert session.ask("unrelated") == (NO_CONTEXT_ANSWER, [])
+    assert stub.prompt_tokens == 0
+    assert session.turns == []
+
+
+def test_generation_goes_through_the_manager_router():
+    class Router:
+        def __init__(self):
+            self.calls = []
+
+        def answer(self, messages, question, distances):
+            self.calls.append((question, distances))
+            return "routed answer", "large"
+
+    manager = FakeManager([("a", "doc A")])
+    manager.router = Router()
+    stub = PrefixCacheStub()
+    session = ChatSession(manager, chat_fn=stub)
+    assert session.ask("education budget") == ("routed answer", ["doc A"])
+    assert manager.router.calls == [("education budget", [0.3])]
+    assert stub.prompt_tokens == 0
+
+
+def test_chat_errors_are_returned_and_leave_the_session_unchanged():
+    def failing_chat(**kwargs):
+        raise ConnectionError("ollama is down")
+
+    session = ChatSession(FakeManager([("a", "doc A")]), chat_fn=failing_chat)
+    answer, docs = session.ask("education budget")
+    assert answer == "Error: ollama is down" and docs == []
+    assert session.turns == [] and session.seen_docs == set()
@@ -0,0 +1,78 @@
+from chroma_database.dedup import (
+    collapse_rows,
+    detect_numeric_columns,
+    group_metadata,
+    group_summary,
+    normalize_text,
+    simhash,
+)
+
+HEADER = ["CICLO", "DESC_RAMO", "DESC_PROGRAMA", "DESC_PARTIDA_ESPECIFICA", "MONTO_APROBADO"]
+PARTIDAS = [
+    "Sueldos base al personal permanente",
+    "Honorarios asimilables a salarios",
+    "Prima quinquenal por años de servicios",
+    "Aguinaldo o gratificación de fin de año",
+    "Materiales y útiles de oficina",
+    "Combustibles para vehículos",
+    "Servicio de energía eléctrica",
+    "Pasajes aéreos nacionales",
+]
+
+
+def budget_rows():
+    return [
+        ["2020", "Educación Pública", "Programa de becas", partida, str(1000 * (j + 1) + r)]
+        for j, partida in enumerate(PARTIDAS) for r in range(3)
+    ]
+
+
+def test_normalize_text_masks_digits_accents_and_punctuation():
+    assert normalize_text("Educación  Pública, 2020!") == "educacion publica #"
+
+
+def test_simhash_is_stable_for_equal_text():
+    assert simhash("sueldos base") == simhash("sueldos base")
+
+
+def test_rows_differing_only_in_amounts_share_a_group():
+    groups = collapse_rows(HEADER, budget_rows())
+    assert len(groups) == len(PARTIDAS)
+    first = groups[0]
+    assert first["rows"] == [0, 1, 2]
+    assert first["numeric"]["MONTO_APROBADO"] == [1000.0, 1001.0, 1002.0]
+    assert group_metadata(first, "budget.csv")["sum_MONTO_APROBADO"] == 3003.0
+
+
+def test_near_duplicate_pass_never_merges_different_partidas():
+    for max_hamming in (0, 6, 12):
+        groups = collapse_rows(HEADER, budget_rows(), max_hamming=max_hamming)
+        assert len(groups) == len(PARTIDAS)
+        sums = sorted(sum(g["numeric"]["MONTO_APROBADO"]) for g in groups)
+        assert sums == sorted(3 * 1000 * (j + 1) + 3 for j in range(len(PARTIDAS)))
+
+
+def test_near_duplicate_descriptions_merge_only_within_the_same_context():
+    rows = [
+        ["2020", "Educación", "Becas", "Sueldos base al personal permanente", "10"],
+        ["2020", "Educación", "Becas", "Sueldo base al personal permanente", "5"],
+        ["2020", "Salud", "Becas", "Sueldo base al personal permanente", "7"],
+    ]
+    assert len(collapse_rows(HEADER, rows)) == 3
+    merged = collapse_rows(HEADER, rows, max_hamming=6)
+    assert sorted(len(g["rows"]) for g in merged) == [1, 2]
+
+
+def test_code_and_period_columns_stay_in_the_text():
+    header = ["CICLO", "ID_RAMO", "CLAVE_PROGRAMA", "DESC_PARTIDA_ESPECIFICA", "MONTO_APROBADO"]
+    rows = [["2019", "11", "101", "Sueldos", "10"], ["2020", "12", "102", "Sueldos", "20"]]
+    assert detect_numeric_columns(header, rows) == ["MONTO_APROBADO"]
+    groups = collapse_rows(header, rows)
+    assert len(groups) == 2
+    assert "ID_RAMO: 11" in groups[0]["text"]
+    assert list(groups[0]["numeric"]) == ["MONTO_APROBADO"]
+
+
+def test_group_summary_carries_the_amounts():
+    group = collapse_rows(HEADER, budget_rows())[0]
+    assert group_summary(group) == "Grouped rows: 3 | MONTO_APROBADO total: 3,003.00"
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from chroma_database.flat_index import DuplicateIDError, FlatIndexCollection
+
+
+def vectors(*rows):
+    return np.asarray(rows, dtype=np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return FlatIndexCollection(str(tmp_path / "flat"), "test")
+
+
+def test_query_returns_nearest_first_with_squared_l2_distances(index):
+    index.add(ids=["x", "y", "z"], embeddings=vectors([1, 0, 0], [0, 1, 0], [1, 1, 0]),
+              documents=["X", "Y", "Z"], metadatas=[{"axis": "x"}, None, None])
+    result = index.query(query_embeddings=vectors([1, 0, 0]), n_results=2)
+    assert result["ids"][0] == ["x", "z"]
+    assert result["documents"][0] == ["X", "Z"]
+    assert result["metadatas"][0][0] == {"axis": "x"}
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+    assert result["distances"][0][1] == pytest.approx(2 - 2 * np.cos(np.pi / 4), abs=1e-6)
+
+
+def test_add_skips_existing_ids_and_upsert_updates(index):
+    index.add(ids=["a"], embeddings=vectors([1, 0]), documents=["old"])
+    index.add(ids=["a"], embeddings=vectors([0, 1]), documents=["ignored"])
+    assert index.get(ids=["a"])["documents"] == ["old"]
+    index.upsert(ids=["a", "b"], embeddings=vectors([0, 1], [1, 0]), documents=["new", "B"])
+    assert index.count() == 2
+    assert index.get(ids=["a"])["documents"] == ["new"]
+    assert index.query(query_embeddings=vectors([0, 1]), n_results=1)["ids"][0] == ["a"]
+
+
+def test_duplicate_ids_in_one_batch_are_rejected(index):
+    with pytest.raises(DuplicateIDError):
+        index.add(ids=["b", "b"], embeddings=vectors([1, 0], [0, 1]), documents=["B", "B"])
+    with pytest.raises(DuplicateIDError):
+        index.upsert(ids=["c", "c"], embeddings=vectors([1, 0], [0, 1]))
+    assert index.count() == 0
+
+
+def test_failed_insert_does_not_lock_up_the_index(tmp_path, index):
+    index.add(ids=["a"], embeddings=vectors([1, 0]), documents=["A"])
+    # Bypass the up-front check so the SQLite insert itself fails.
+    with pytest.raises(Exception):
+        index._append(["a"], vectors([0, 1]), ["dup"], None)
+    index.add(ids=["d"], embeddings=vectors([0, 1]), documents=["D"])
+    assert index.count() == 2
+    assert index.query(query_embeddings=vectors([0, 1]), n_results=1)["ids"][0] == ["d"]
+
+    reopened = FlatIndexCollection(str(tmp_path / "flat"), "test")
+    assert reopened.count() == 2
+    assert reopened._log.shape[0] == 2
+    assert reopened.query(query_embeddings=vectors([0, 1]), n_results=1)["documents"][0] == ["D"]
+
+
+def test_compaction_and_reopen_keep_all_rows(tmp_path):
+    path = str(tmp_path / "flat")
+    index = FlatIndexCollection(path, "test", compact_every=3)
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(7, 8)).astype(np.float32)
+    for i in range(7):
+        index.add(ids=[f"r{i}"], embeddings=data[i:i + 1], documents=[f"doc {i}"])
+    reopened = FlatIndexCollection(path, "test")
+    assert reopened.count() == 7
+    for i in (0, 6):
+        assert reopened.query(query_embeddings=data[i:i + 1], n_results=1)["ids"][0] == [f"r{i}"]
+
+
+def test_dimension_mismatch_is_rejected(index):
+    index.add(ids=["a"], embeddings=vectors([1, 0, 0]))
+    with pytest.raises(ValueError):
+        index.add(ids=["b"], embeddings=vectors([1, 0]))
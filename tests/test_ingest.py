@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+from chroma_database.ingest import IngestJobManager
+
+
+class FlakySink:
+    """Records committed ids; fails the first ``transient`` calls and every batch in ``broken``."""
+
+    def __init__(self, transient=0, broken=()):
+        self.transient = transient
+        self.broken = set(broken)
+        self.calls = 0
+        self.committed = []
+
+    def __call__(self, ids, texts, metadatas=None):
+        self.calls += 1
+        if self.transient:
+            self.transient -= 1
+            raise ConnectionError("store unavailable")
+        if self.broken & set(ids):
+            raise ConnectionError("store down")
+        self.committed.extend(ids)
+
+
+def write_csv(path, rows=10):
+    lines = ["ID,DESC"] + [f'{i},"row {i}"' for i in range(rows)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def wait(jobs, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while jobs.status(job_id)["status"] in ("pending", "running"):
+        assert time.time() < deadline, "ingest job did not finish"
+        time.sleep(0.01)
+    return jobs.status(job_id)
+
+
+def test_failed_batch_is_retried(tmp_path):
+    sink = FlakySink(transient=2)
+    jobs = IngestJobManager(None, jobs_dir=str(tmp_path / "jobs"), backoff=0, sink=sink)
+    job = wait(jobs, jobs.submit_csv(write_csv(tmp_path / "data.csv"), batch_size=4))
+    assert job["status"] == "done" and job["progress"] == 1.0
+    assert job["retries"] == 2
+    assert sink.committed == [f"data.csv_row_{i}" for i in range(10)]
+
+
+def test_failed_job_resumes_from_the_last_checkpoint(tmp_path):
+    path = write_csv(tmp_path / "data.csv")
+    jobs_dir = str(tmp_path / "jobs")
+    sink = FlakySink(broken=["data.csv_row_7"])
+    jobs = IngestJobManager(None, jobs_dir=jobs_dir, max_retries=1, backoff=0, sink=sink)
+    job_id = jobs.submit_csv(path, batch_size=3)
+    job = wait(jobs, job_id)
+    assert job["status"] == "failed" and job["error"] == "store down"
+    assert sink.committed == [f"data.csv_row_{i}" for i in range(6)]
+
+    with open(os.path.join(jobs_dir, f"{job_id}.json"), encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert (checkpoint["row_index"], checkpoint["uploaded"], checkpoint["last_batch"]) == (6, 6, 1)
+
+    # A fresh manager (e.g. after a restart) picks the job up from its checkpoint.
+    sink.broken.clear()
+    restarted = IngestJobManager(None, jobs_dir=jobs_dir, backoff=0, sink=sink)
+    assert restarted.resume(job_id) == "pending"
+    job = wait(restarted, job_id)
+    assert job["status"] == "done" and job["uploaded"] == 10
+    assert sink.committed == [f"data.csv_row_{i}" for i in range(10)]
+
+
+def test_jobs_running_at_shutdown_are_marked_interrupted(tmp_path):
+    path = write_csv(tmp_path / "data.csv")
+    jobs_dir = tmp_path / "jobs"
+    jobs = IngestJobManager(None, jobs_dir=str(jobs_dir), sink=FlakySink())
+    job_id = jobs.submit_csv(path, batch_size=3)
+    wait(jobs, job_id)
+    job_file = jobs_dir / f"{job_id}.json"
+    job = json.loads(job_file.read_text(encoding="utf-8"))
+    job.update(status="running", row_index=0, uploaded=0, last_batch=-1, byte_offset=0)
+    job_file.write_text(json.dumps(job), encoding="utf-8")
+
+    sink = FlakySink()
+    restarted = IngestJobManager(None, jobs_dir=str(jobs_dir), sink=sink)
+    assert restarted.status(job_id)["status"] == "interrupted"
+    assert restarted.resume_incomplete() == [job_id]
+    assert wait(restarted, job_id)["status"] == "done"
+    assert sink.committed == [f"data.csv_row_{i}" for i in range(10)]
@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from chroma_database.maintenance import maintain_chroma, maintain_lancedb, run_maintenance
+
+
+def test_maintain_lancedb_compacts_and_prunes_a_scratch_table(tmp_path):
+    lancedb = pytest.importorskip("lancedb")
+    pytest.importorskip("lance")
+    db_path = str(tmp_path / "db")
+    table = lancedb.connect(db_path).create_table(
+        "knowledge", data=[{"id": "0", "text": "row 0", "vector": [0.0, 1.0]}])
+    for i in range(1, 6):
+        table.add([{"id": str(i), "text": f"row {i}", "vector": [float(i), 1.0]}])
+    assert len(table.list_versions()) > 1
+
+    report = maintain_lancedb(db_path, older_than_days=0)
+    entry = report["knowledge"]
+    assert entry["status"] == "ok"
+    assert entry["latency_ms_before"] is not None and entry["latency_ms_after"] is not None
+    assert entry["size_after"] <= entry["size_before"]
+
+    table = lancedb.connect(db_path).open_table("knowledge")
+    assert len(table.list_versions()) == 1
+    assert table.count_rows() == 6
+    assert table.search([5.0, 1.0]).limit(1).to_list()[0]["id"] == "5"
+
+
+def test_maintain_chroma_vacuums_the_sqlite_store(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "chroma.sqlite3"))
+    conn.execute("CREATE TABLE embeddings (id TEXT, body TEXT)")
+    conn.executemany("INSERT INTO embeddings VALUES (?, ?)", [(str(i), "x" * 1000) for i in range(500)])
+    conn.execute("DELETE FROM embeddings")
+    conn.commit()
+    conn.close()
+
+    entry = maintain_chroma(str(tmp_path))
+    assert entry["status"] == "ok"
+    assert entry["size_after"] < entry["size_before"]
+
+
+def test_run_maintenance_skips_missing_stores(tmp_path):
+    assert run_maintenance(str(tmp_path / "missing"), str(tmp_path)) == {}
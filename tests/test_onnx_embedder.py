@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from chroma_database.onnx_embedder import OnnxEmbedder
+
+
+class FakeTokenizer:
+    def encode_batch(self, texts):
+        return [SimpleNamespace(ids=[ord(c) for c in text]) for text in texts]
+
+
+class FakeSession:
+    """Token-level output ``[id, 1]``, so mean pooling gives each text its own direction."""
+
+    def __init__(self):
+        self.shapes = []
+
+    def run(self, output_names, feeds):
+        input_ids = feeds["input_ids"]
+        self.shapes.append(input_ids.shape)
+        return [np.stack([input_ids, np.ones_like(input_ids)], axis=-1).astype(np.float32)]
+
+
+def fake_embedder(batch_size):
+    embedder = OnnxEmbedder.__new__(OnnxEmbedder)
+    embedder.batch_size = batch_size
+    embedder.tokenizer = FakeTokenizer()
+    embedder.session = FakeSession()
+    embedder.input_names = {"input_ids", "attention_mask"}
+    return embedder
+
+
+def test_batches_are_bucketed_by_length_and_padded_to_their_longest_text():
+    embedder = fake_embedder(batch_size=2)
+    embedder.embed_batch(["eeeee", "a", "ccc", "bb", "dddd"])
+    assert embedder.session.shapes == [(2, 2), (2, 4), (1, 5)]
+
+
+def test_vectors_come_back_in_input_order_without_padding_effects():
+    texts = ["eeeee", "a", "ccc", "bb", "dddd"]
+    embedder = fake_embedder(batch_size=2)
+    vectors = embedder.embed_batch(texts)
+    assert vectors.dtype == np.float32 and vectors.shape == (5, 2)
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, embedder.embed_batch([text])[0], rtol=1e-6)
+    assert len({tuple(v) for v in vectors.round(6)}) == len(texts)
+
+
+def test_prefix_is_tokenized_with_each_text():
+    embedder = fake_embedder(batch_size=8)
+    vectors = embedder.embed_batch(["ab", "ba"], prefix="q")
+    expected = np.array([[np.mean([ord("q"), ord("a"), ord("b")]), 1.0]] * 2, dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(vectors, expected, rtol=1e-6)
+    assert embedder.session.shapes == [(2, 3)]
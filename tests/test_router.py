@@ -0,0 +1,77 @@
+from chroma_database.router import ModelRouter, strip_thinking
+
+
+class StubChat:
+    """Replies per model from a fixed table and records which models were called."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+
+    def __call__(self, model, messages):
+        self.calls.append(model)
+        return {"message": {"content": self.replies[model]}}
+
+
+MESSAGES = [{"role": "user", "content": "question"}]
+
+
+def router(replies, **kwargs):
+    chat = StubChat(replies)
+    return ModelRouter(models=["small", "large"], chat_fn=chat, **kwargs), chat
+
+
+def test_simple_question_with_good_retrieval_stays_on_the_small_model():
+    r, chat = router({"small": "42 million", "large": "unused"})
+    assert r.answer(MESSAGES, "Education budget?", [0.2, 0.4]) == ("42 million", "small")
+    assert chat.calls == ["small"]
+
+
+def test_complex_question_starts_on_the_large_model():
+    r, chat = router({"small": "unused", "large": "a comparison"})
+    question = "Compare the total education budget with health and explain the difference between them?"
+    assert r.complexity(question) >= r.complexity_threshold
+    assert r.answer(MESSAGES, question, [0.2]) == ("a comparison", "large")
+    assert chat.calls == ["large"]
+
+
+def test_weak_retrieval_escalates_even_below_the_relevance_threshold():
+    r, chat = router({"small": "unused", "large": "careful answer"})
+    # Distances that reach the router already passed relevance_threshold (1.0)
+    assert r.retrieval_is_weak([0.8, 0.95])
+    assert not r.retrieval_is_weak([0.3, 0.95])
+    assert not r.retrieval_is_weak(None)
+    assert r.answer(MESSAGES, "Education budget?", [0.8, 0.95]) == ("careful answer", "large")
+
+
+def test_hedged_or_empty_answer_escalates():
+    for weak in ("<think>hmm</think>I don't know.", "", "That is not provided in the context."):
+        r, chat = router({"small": weak, "large": "the answer"})
+        assert r.answer(MESSAGES, "Education budget?", [0.2]) == ("the answer", "large")
+        assert chat.calls == ["small", "large"]
+
+
+def test_last_model_answer_is_returned_even_if_hedged():
+    r, chat = router({"small": "I don't know", "large": "I don't know"})
+    assert r.answer(MESSAGES, "Education budget?", [0.2]) == ("I don't know", "large")
+
+
+def test_report_counts_calls_and_escalations():
+    r, _ = router({"small": "I don't know", "large": "fine"})
+    r.answer(MESSAGES, "Education budget?", [0.2])
+    r.answer(MESSAGES, "Health budget?", [0.9])
+    report = r.report()
+    assert report["_total"] == {"questions": 2}
+    assert report["small"]["calls"] == 1 and report["small"]["escalation_rate"] == 1.0
+    assert report["large"]["calls"] == 2 and report["large"]["escalation_rate"] == 0.0
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv("RAG_MODELS", raising=False)
+    assert ModelRouter.from_env() is None
+    monkeypatch.setenv("RAG_MODELS", "a, b")
+    assert ModelRouter.from_env().models == ["a", "b"]
+
+
+def test_strip_thinking():
+    assert strip_thinking("<think>\nreasoning\n</think>\n answer ") == "answer"
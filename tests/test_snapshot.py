@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from chroma_database.flat_index import FlatIndexCollection
+from chroma_database.snapshot import (
+    export_collection,
+    export_lancedb,
+    import_to_collection,
+    import_to_lancedb,
+    iter_snapshot,
+    read_snapshot_info,
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    collection = FlatIndexCollection(str(tmp_path / "source"), "source")
+    rng = np.random.default_rng(0)
+    collection.add(ids=[f"doc{i}" for i in range(5)], embeddings=rng.normal(size=(5, 4)),
+                   documents=[f"text {i}" for i in range(5)],
+                   metadatas=[{"page": i} if i % 2 else None for i in range(5)])
+    return collection
+
+
+@pytest.mark.parametrize("suffix", [".arrow", ".parquet"])
+def test_flat_index_round_trip(tmp_path, source, suffix):
+    path = str(tmp_path / f"snap{suffix}")
+    assert export_collection(source, path, model_name="mini", batch_size=2) == 5
+    info = read_snapshot_info(path)
+    assert info["model"] == "mini" and info["dimension"] == "4"
+    assert sum(b.num_rows for b in iter_snapshot(path, batch_size=2)) == 5
+
+    target = FlatIndexCollection(str(tmp_path / "target"), "target")
+    assert import_to_collection(target, path, batch_size=2, model_name="mini") == 5
+    original = source.get(ids=["doc1", "doc2"], include=["documents", "metadatas", "embeddings"])
+    restored = target.get(ids=["doc1", "doc2"], include=["documents", "metadatas", "embeddings"])
+    assert restored["documents"] == original["documents"]
+    assert restored["metadatas"] == original["metadatas"]
+    np.testing.assert_allclose(restored["embeddings"], original["embeddings"], rtol=1e-6)
+
+
+def test_import_rejects_other_model_unless_forced(tmp_path, source):
+    path = str(tmp_path / "snap.arrow")
+    export_collection(source, path, model_name="mini")
+    target = FlatIndexCollection(str(tmp_path / "target"), "target")
+    with pytest.raises(ValueError, match="embedded with 'mini'"):
+        import_to_collection(target, path, model_name="nomic")
+    assert target.count() == 0
+    assert import_to_collection(target, path, model_name="nomic", force=True) == 5
+
+
+def test_import_rejects_other_dimension(tmp_path, source):
+    path = str(tmp_path / "snap.arrow")
+    export_collection(source, path)
+    target = FlatIndexCollection(str(tmp_path / "target"), "target")
+    target.add(ids=["x"], embeddings=np.ones((1, 8)))
+    with pytest.raises(ValueError, match="dimension 4"):
+        import_to_collection(target, path, force=True)
+
+
+def test_lancedb_round_trip_keeps_the_table_schema(tmp_path, source):
+    lancedb = pytest.importorskip("lancedb")
+    pytest.importorskip("lance")
+    from lancedb.embeddings import TextEmbeddingFunction, get_registry, register
+    from lancedb.pydantic import LanceModel, Vector
+
+    @register("snapshot-test-constant")
+    class ConstantEmbeddings(TextEmbeddingFunction):
+        name: str = "constant-4"
+
+        def ndims(self):
+            return 4
+
+        def generate_embeddings(self, texts):
+            return [[0.5, 0.5, 0.5, 0.5] for _ in texts]
+
+    embedder = get_registry().get("snapshot-test-constant").create(name="mini")
+
+    class Doc(LanceModel):
+        id: str
+        text: str = embedder.SourceField()
+        vector: Vector(4) = embedder.VectorField()
+
+    path = str(tmp_path / "snap.arrow")
+    export_collection(source, path, model_name="mini")
+    db_path = str(tmp_path / "lancedb")
+
+    assert import_to_lancedb(path, db_path, "knowledge", mode="create", schema=Doc) == 5
+    table = lancedb.connect(db_path).open_table("knowledge")
+    assert table.schema.names == ["id", "text", "vector"]
+    # The embedding function config survives, so string searches still work.
+    assert len(table.search("text 1").limit(2).to_list()) == 2
+
+    # Overwrite keeps the existing table's schema and its model for the check.
+    assert import_to_lancedb(path, db_path, "knowledge") == 5
+    assert b"embedding_functions" in lancedb.connect(db_path).open_table("knowledge").schema.metadata
+
+    other = str(tmp_path / "other.arrow")
+    export_collection(source, other, model_name="nomic")
+    with pytest.raises(ValueError, match="embedded with 'nomic'"):
+        import_to_lancedb(other, db_path, "knowledge", mode="append")
+
+    exported = str(tmp_path / "from_lancedb.parquet")
+    assert export_lancedb(db_path, "knowledge", exported) == 5
+    assert read_snapshot_info(exported)["model"] == "mini"
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+
+from chroma_database.summaries import SPECIFIC_QUESTION, SummaryIndex
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+
+    def upsert(self, ids, documents, metadatas):
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            self.rows[doc_id] = (document, metadata)
+
+    def get(self, ids):
+        return {"ids": ids, "documents": [self.rows[i][0] for i in ids],
+                "metadatas": [self.rows[i][1] for i in ids]}
+
+    def count(self):
+        return len(self.rows)
+
+
+class FakeSummaryCollection(FakeCollection):
+    def query(self, query_texts, n_results):
+        ids = list(self.rows)[:n_results]
+        return {"ids": [ids], "documents": [[self.rows[i][0] for i in ids]],
+                "metadatas": [[self.rows[i][1] for i in ids]], "distances": [[1.5] * len(ids)]}
+
+
+class FakePageCollection(FakeCollection):
+    def query(self, query_texts, n_results, where=None):
+        self.queries.append(where)
+        ids = [i for i, (_, m) in self.rows.items() if self._matches(m, where)][:n_results]
+        return {"ids": [ids], "documents": [[self.rows[i][0] for i in ids]], "distances": [[0.4] * len(ids)]}
+
+    def _matches(self, metadata, where):
+        if "$or" in where:
+            return any(self._matches(metadata, w) for w in where["$or"])
+        if "$and" in where:
+            return all(self._matches(metadata, w) for w in where["$and"])
+        (key, condition), = where.items()
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            (op, bound), = condition.items()
+            return value is not None and (value >= bound if op == "$gte" else value <= bound)
+        return value == condition
+
+
+class FakeManager:
+    chat_model = "test-model"
+
+    def __init__(self):
+        self.collection = FakePageCollection()
+
+    def _create_doc_id(self, source, identifier):
+        return f"{os.path.basename(source)}_{identifier}"
+
+
+def slow_chat(model, messages):
+    time.sleep(0.02)
+    return {"message": {"content": "<think>...</think>summary of " + messages[1]["content"][:20]}}
+
+
+def test_specific_question_ignores_apostrophes():
+    assert not SPECIFIC_QUESTION.search("What's the overall budget trend?")
+    assert SPECIFIC_QUESTION.search("What does 'Programa de becas' cover?")
+    assert SPECIFIC_QUESTION.search('Summarize "salud"')
+    assert SPECIFIC_QUESTION.search("How much went to health in 2020?")
+
+
+def test_concurrent_builds_do_not_deadlock():
+    index = SummaryIndex(FakeManager(), FakeSummaryCollection(), max_workers=2, chat_fn=slow_chat)
+    pages = {i: f"page {i}" for i in range(30)}
+    sections = [("A", 0, 10), ("B", 10, 20), ("C", 20, 30)]
+    futures = [index.submit(f"doc{j}.pdf", pages, sections) for j in range(3)]
+    assert [f.result(timeout=10) for f in futures] == [4, 4, 4]
+    assert json.loads(index.collection.rows["doc0.pdf_section_1"][1]["pages"])[0] == "doc0.pdf_page_10"
+
+
+def test_drill_down_only_returns_pages_of_matched_sections():
+    manager = FakeManager()
+    for source in ("a.pdf", "b.pdf"):
+        for page in range(6):
+            manager.collection.upsert([f"{source}_page_{page}"], [f"{source} page {page}"],
+                                      [{"source": source, "page": page}])
+
+    index = SummaryIndex(manager, FakeSummaryCollection(), chat_fn=slow_chat)
+    index.collection.upsert(
+        ["a.pdf_section_1"], ["Section two"],
+        [{"level": "section", "source": "a.pdf", "title": "Two", "first_page": 3, "last_page": 5,
+          "pages": json.dumps([f"a.pdf_page_{i}" for i in range(3, 6)])}],
+    )
+
+    documents, _, drilled = index.retrieve("How much was approved in 2020?", n_summaries=1, drill_down_pages=5)
+    assert drilled
+    assert documents[1:] == ["a.pdf page 3", "a.pdf page 4", "a.pdf page 5"]
+
+
+def test_drill_down_falls_back_to_linked_pages_without_page_metadata():
+    manager = FakeManager()
+    for page in range(4):
+        manager.collection.upsert([f"a.pdf_page_{page}"], [f"page {page}"], [{}])
+
+    index = SummaryIndex(manager, FakeSummaryCollection(), chat_fn=slow_chat)
+    index.collection.upsert(
+        ["a.pdf_section_0"], ["Section"],
+        [{"level": "section", "source": "a.pdf", "title": "S", "first_page": 2, "last_page": 3,
+          "pages": json.dumps(["a.pdf_page_2", "a.pdf_page_3"])}],
+    )
+    documents, distances, drilled = index.retrieve("exact figures?", n_summaries=1)
+    assert drilled
+    assert documents[1:] == ["page 2", "page 3"]
+    assert distances[1:] == [1.5, 1.5]
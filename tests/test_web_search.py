@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from chroma_database.web_search import (
+    CachedSearchProvider,
+    SearchTimeout,
+    StubSearchProvider,
+    TokenBucket,
+    normalize_query,
+)
+
+
+def test_normalize_query():
+    assert normalize_query("  IMF   Argentina\tbudget ") == "imf argentina budget"
+
+
+def test_stub_provider_counts_calls_and_matches_normalized_queries():
+    stub = StubSearchProvider({"IMF budget": ["a", "b", "c"]})
+    assert stub.search("imf  BUDGET", num_results=2) == ["a", "b"]
+    assert stub.search("other", num_results=2) == ["stub result 1 for other", "stub result 2 for other"]
+    assert stub.calls == 2
+
+
+def test_cache_hit_skips_the_provider():
+    stub = StubSearchProvider({"imf": ["snippet"]})
+    provider = CachedSearchProvider(stub)
+    assert provider.search("IMF") == ["snippet"]
+    assert provider.search(" imf ") == ["snippet"]
+    assert stub.calls == 1
+    assert provider.stats["hits"] == 1
+    assert provider.stats["misses"] == 1
+
+
+def test_identical_concurrent_queries_are_coalesced():
+    stub = StubSearchProvider(delay=0.2)
+    provider = CachedSearchProvider(stub, burst=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.search("same question")))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stub.calls == 1
+    assert len(results) == 5 and all(r == results[0] for r in results)
+    assert provider.stats["coalesced"] == 4
+
+
+def test_stale_entry_is_served_and_refreshed_in_background():
+    stub = StubSearchProvider({"q": ["old"]})
+    provider = CachedSearchProvider(stub, ttl=0.05, stale_ttl=60, burst=10)
+    assert provider.search("q") == ["old"]
+    time.sleep(0.1)
+    stub.responses["q"] = ["new"]
+    assert provider.search("q") == ["old"]
+    assert provider.stats["stale"] == 1
+    deadline = time.time() + 2
+    while provider.search("q") != ["new"] and time.time() < deadline:
+        time.sleep(0.02)
+    assert provider.search("q") == ["new"]
+    assert stub.calls == 2
+
+
+def test_slow_provider_raises_search_timeout():
+    provider = CachedSearchProvider(StubSearchProvider(delay=0.5), timeout=0.05)
+    with pytest.raises(SearchTimeout):
+        provider.search("slow")
+
+
+def test_token_bucket_limits_bursts():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.acquire(timeout=0)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0)